@@ -0,0 +1,125 @@
+# alerts.py
+DEFAULT_THRESHOLDS = {
+    'urgent_low': 54,       # mg/dL
+    'low': 70,              # mg/dL, hypoglycemia
+    'high': 240,            # mg/dL, hyperglycemia
+    'predict_minutes': 20   # horizon of the predicted-low rule
+}
+
+# Readings further apart than this restart the trend estimate
+MAX_TREND_GAP_SECONDS = 15 * 60
+
+# Weight of the newest rate of change in the smoothed trend
+TREND_SMOOTHING = 0.5
+
+MESSAGES = {
+    'urgent_low': "🚨 Urgent low: {value:.0f} mg/dL. Take 15g fast carbs now; call 911 if unable to swallow.",
+    'low': "⚠️ Low blood sugar: {value:.0f} mg/dL. Take 15g fast carbs and recheck in 15 minutes.",
+    'predicted_low': "📉 Predicted low within {minutes} minutes: {value:.0f} mg/dL, falling {rate:.1f} mg/dL/min.",
+    'high': "⚠️ High blood sugar: {value:.0f} mg/dL. Check ketones; contact your provider if you have symptoms."
+}
+
+
+class Alert:
+    __slots__ = ('patient_id', 'kind', 'timestamp', 'value', 'message')
+
+    def __init__(self, patient_id, kind, timestamp, value, message):
+        self.patient_id = patient_id
+        self.kind = kind
+        self.timestamp = timestamp
+        self.value = value
+        self.message = message
+
+    def __repr__(self):
+        return f"Alert({self.patient_id!r}, {self.kind!r}, {self.timestamp}, {self.value})"
+
+
+class PatientState:
+    """Fixed-size per-patient state: last reading, smoothed trend, active alerts"""
+    __slots__ = ('timestamp', 'value', 'rate', 'active')
+
+    def __init__(self):
+        self.timestamp = None
+        self.value = None
+        self.rate = 0.0  # mg/dL per minute
+        self.active = frozenset()
+
+
+class AlertEngine:
+    """Evaluate each new reading against hypo/hyperglycemia rules incrementally
+
+    Alerts are edge-triggered: one fires when a patient enters a condition
+    and again only after leaving it. Every alert is returned from
+    process() and passed to subscribed callbacks.
+    """
+
+    def __init__(self, thresholds=None):
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self._patients = {}
+        self._callbacks = []
+
+    def subscribe(self, callback):
+        """Call ``callback(alert)`` for every alert raised"""
+        self._callbacks.append(callback)
+
+    def unsubscribe(self, callback):
+        self._callbacks.remove(callback)
+
+    def state(self, patient_id):
+        return self._patients.get(patient_id)
+
+    def _conditions(self, value, rate):
+        thresholds = self.thresholds
+        conditions = set()
+        if value < thresholds['urgent_low']:
+            conditions.add('urgent_low')
+        elif value < thresholds['low']:
+            conditions.add('low')
+        elif value > thresholds['high']:
+            conditions.add('high')
+        if value >= thresholds['low'] and rate < 0:
+            predicted = value + rate * thresholds['predict_minutes']
+            if predicted < thresholds['low']:
+                conditions.add('predicted_low')
+        return frozenset(conditions)
+
+    def process(self, patient_id, timestamp, mgdl):
+        """Evaluate one reading; returns the alerts it raised"""
+        state = self._patients.get(patient_id)
+        if state is None:
+            state = self._patients[patient_id] = PatientState()
+        elif state.timestamp is not None and timestamp <= state.timestamp:
+            return []  # duplicate or out-of-order reading
+
+        if state.timestamp is not None and timestamp - state.timestamp <= MAX_TREND_GAP_SECONDS:
+            rate = (mgdl - state.value) * 60 / (timestamp - state.timestamp)
+            state.rate = TREND_SMOOTHING * rate + (1 - TREND_SMOOTHING) * state.rate
+        else:
+            state.rate = 0.0
+        state.timestamp, state.value = timestamp, mgdl
+
+        conditions = self._conditions(mgdl, state.rate)
+        raised = conditions - state.active
+        state.active = conditions
+        if not raised:
+            return []
+
+        alerts = []
+        for kind in sorted(raised):
+            predicted = mgdl + state.rate * self.thresholds['predict_minutes']
+            message = MESSAGES[kind].format(
+                value=predicted if kind == 'predicted_low' else mgdl,
+                minutes=self.thresholds['predict_minutes'], rate=-state.rate)
+            alert = Alert(patient_id, kind, timestamp, mgdl, message)
+            alerts.append(alert)
+            for callback in self._callbacks:
+                callback(alert)
+        return alerts
+
+    def process_many(self, patient_ids, timestamps, values):
+        """Evaluate a backlog of readings in arrival order; returns all alerts"""
+        alerts = []
+        process = self.process
+        for patient_id, timestamp, value in zip(patient_ids, timestamps, values):
+            alerts.extend(process(patient_id, int(timestamp), float(value)))
+        return alerts
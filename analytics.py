@@ -0,0 +1,153 @@
+# analytics.py
+import numpy as np
+import pandas as pd
+
+from glucose import MGDL_PER_MMOL
+
+# International consensus CGM ranges (mg/dL): <54, 54-69, 70-180, >180-250, >250.
+# The first two edges are lower bounds of the bin above them and the rest upper
+# bounds of the bin below, so 70 and 180 are in range but 180.5 is high.
+TIR_EDGES_MGDL = (54, 70, 180, 250)
+# The same ranges as published in mmol/L (<3.0, 3.0-3.8, 3.9-10.0, >10.0-13.9,
+# >13.9); converting readings to mg/dL would put 10.0 (180.2) above range.
+TIR_EDGES_MMOL = (3.0, 3.9, 10.0, 13.9)
+TIR_UPPER_FROM = 2
+TIR_LABELS = ('Very Low', 'Low', 'In Range', 'High', 'Very High')
+
+AGP_PERCENTILES = (5, 25, 50, 75, 95)
+AGP_SLOT_MINUTES = 15
+
+# Gaps longer than this (sensor off, no meter checks) count for no more time
+MAX_GAP_SECONDS = 15 * 60
+
+
+def to_mgdl(values, units='mg/dL'):
+    values = np.asarray(values, dtype=np.float64)
+    return values * MGDL_PER_MMOL if units == 'mmol/L' else values
+
+
+def tir_edges(units='mg/dL'):
+    return TIR_EDGES_MMOL if units == 'mmol/L' else TIR_EDGES_MGDL
+
+
+def reading_weights(timestamps, max_gap=MAX_GAP_SECONDS):
+    """Seconds of wear each reading stands for, capped at ``max_gap``"""
+    timestamps = np.asarray(timestamps, dtype=np.int64)
+    if len(timestamps) < 2:
+        return np.ones(len(timestamps))
+    # The newest reading stands for as long as the interval before it
+    gaps = np.diff(timestamps, append=2 * timestamps[-1] - timestamps[-2])
+    return np.clip(gaps, 1, max_gap).astype(np.float64)
+
+
+def classify(values, edges=TIR_EDGES_MGDL, upper_from=TIR_UPPER_FROM):
+    """Bin index of every reading
+
+    Bin i spans [edges[i-1], edges[i]) for edges before ``upper_from`` and
+    (edges[i-1], edges[i]] from there on. ``edges`` are in the same units
+    as ``values``. Use reference_edges() with ``upper_from=None`` to
+    classify against the Health Overview glucose ranges table instead.
+    """
+    edges = np.asarray(edges, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if upper_from is None:
+        upper_from = len(edges)
+    return (np.searchsorted(edges[:upper_from], values, side='right')
+            + np.searchsorted(edges[upper_from:], values, side='left'))
+
+
+def reference_edges(glucose_ranges):
+    """Lower bounds of the reference 'glucose_ranges' table as bin edges
+
+    Returns the edges (mg/dL) and labels, with 'Below Range' for readings
+    under the lowest band. Every edge is a lower bound, so classify with
+    ``upper_from=None``.
+    """
+    edges = tuple(glucose_ranges['Min'])
+    return edges, ('Below Range',) + tuple(glucose_ranges['Range'])
+
+
+def range_distribution(values, timestamps=None, edges=TIR_EDGES_MGDL, labels=TIR_LABELS,
+                       upper_from=TIR_UPPER_FROM):
+    """Fraction of time spent in each range, weighted by reading interval if timestamps given
+
+    ``edges`` must be in the units of ``values``; use TIR_EDGES_MMOL for
+    mmol/L readings.
+    """
+    bins = classify(values, edges, upper_from)
+    weights = None if timestamps is None else reading_weights(timestamps)
+    totals = np.bincount(bins, weights=weights, minlength=len(edges) + 1)
+    total = totals.sum()
+    fractions = totals / total if total else totals
+    return dict(zip(labels, fractions.tolist()))
+
+
+def glucose_management_indicator(mean_mgdl):
+    """GMI (estimated HbA1c, %) from mean glucose in mg/dL"""
+    return 3.31 + 0.02392 * mean_mgdl
+
+
+def glycemic_summary(timestamps, values, units='mg/dL'):
+    """Time in/below/above range, mean, GMI and CV for one patient's readings"""
+    mgdl = to_mgdl(values, units)
+    if not len(mgdl):
+        return None
+    weights = reading_weights(timestamps)
+    mean = np.average(mgdl, weights=weights)
+    std = np.sqrt(np.average((mgdl - mean) ** 2, weights=weights))
+    ranges = range_distribution(values, timestamps, tir_edges(units))
+    factor = 1 / MGDL_PER_MMOL if units == 'mmol/L' else 1
+    return {
+        'readings': len(mgdl),
+        'mean': float(mean * factor),
+        'gmi': float(glucose_management_indicator(mean)),
+        'cv': float(100 * std / mean) if mean else 0.0,
+        'time_below_range': ranges['Very Low'] + ranges['Low'],
+        'time_in_range': ranges['In Range'],
+        'time_above_range': ranges['High'] + ranges['Very High'],
+        'ranges': ranges
+    }
+
+
+def local_seconds_of_day(timestamps, timezone='UTC'):
+    """Seconds since local midnight of every reading, with each reading's own UTC offset"""
+    local = pd.to_datetime(np.asarray(timestamps, dtype=np.int64), unit='s', utc=True).tz_convert(timezone)
+    # Wall-clock time as if it were UTC, so DST changes inside the window are honoured
+    return local.tz_localize(None).as_unit('s').asi8 % 86400
+
+
+def ambulatory_glucose_profile(timestamps, values, timezone='UTC',
+                               percentiles=AGP_PERCENTILES, slot_minutes=AGP_SLOT_MINUTES):
+    """AGP percentile bands by time of day in ``timezone`` (a name or tzinfo)
+
+    Returns (slot start minutes, array of shape (len(percentiles), slots));
+    slots without readings are NaN. Percentiles are linearly interpolated,
+    computed for all slots at once from one sort.
+    """
+    slot_seconds = slot_minutes * 60
+    slots = 86400 // slot_seconds
+    values = np.asarray(values, dtype=np.float64)
+    slot = local_seconds_of_day(timestamps, timezone) // slot_seconds
+
+    order = np.lexsort((values, slot))
+    ordered = values[order]
+    counts = np.bincount(slot, minlength=slots)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    bands = np.full((len(percentiles), slots), np.nan)
+    filled = counts > 0
+    for row, p in enumerate(percentiles):
+        position = (p / 100) * (counts[filled] - 1)
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        fraction = position - low
+        base = starts[filled]
+        bands[row, filled] = (ordered[base + low] * (1 - fraction)
+                              + ordered[base + high] * fraction)
+    return np.arange(slots) * slot_minutes, bands
+
+
+def agp_frame(minutes, bands, percentiles=AGP_PERCENTILES):
+    """DataFrame of AGP bands indexed by time of day, for st.line_chart"""
+    index = pd.Index([f"{m // 60:02d}:{m % 60:02d}" for m in minutes], name='Time of Day')
+    return pd.DataFrame({f"P{p}": band for p, band in zip(percentiles, bands)}, index=index)
@@ -0,0 +1,263 @@
+# answering.py
+"""Headless question answering, usable without a Streamlit script run
+
+    python answering.py questions.jsonl -o answers.jsonl --workers 8
+
+Each input line is a JSON object with a 'question' and an optional
+'user_type' (default "Patient") and 'experience' (default "Newly
+Diagnosed"); any other fields such as an 'id' are copied to the matching
+output line.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from audience import DEFAULT_EXPERIENCE, DEFAULT_USER_TYPE, render
+from knowledge_base import KnowledgeBase, TOPIC_ERRORS, TOPICS
+from metrics import ANSWER_STAGE_SECONDS, FALLBACK_ANSWERS, QUESTIONS_ANSWERED, span
+
+DEFAULT_CACHE_SIZE = 1024
+
+# Batches smaller than this are answered in-process; a pool costs more to start
+POOL_THRESHOLD = 2000
+
+
+def load_passage_index(index_dir=None):
+    """Open the guideline passage index in index_dir or DIABETES_CORPUS_INDEX"""
+    index_dir = index_dir or os.environ.get('DIABETES_CORPUS_INDEX')
+    if not index_dir or not os.path.isdir(index_dir):
+        return None
+    from retrieval import PassageIndex  # NumPy is only needed with a passage index
+    return PassageIndex.load(index_dir)
+
+
+def normalize_question(question):
+    """Case-, whitespace- and punctuation-insensitive form of a question"""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', question.lower()).split())
+
+
+class AnswerCache:
+    """Thread-safe LRU cache of answers, emptied when the content version changes"""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.version = None
+        self.hits = self.misses = self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        """Cached value for key, or None; a new version invalidates everything"""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, version, value):
+        with self._lock:
+            if version != self.version or self.maxsize <= 0:
+                return
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class Answerer:
+    """Selects and customizes answers; holds no per-session state"""
+
+    def __init__(self, knowledge_base, passage_index=None, cache=None):
+        self.knowledge_base = knowledge_base
+        self.passage_index = passage_index
+        self.cache = cache
+
+    def answer(self, question, user_type=DEFAULT_USER_TYPE, experience=DEFAULT_EXPERIENCE):
+        """Answer one question as a dict with 'answer', 'sources' and 'topic_id'"""
+        # One knowledge base for the whole answer, even if a reload swaps it meanwhile
+        knowledge_base = self.knowledge_base
+        if self.cache is None:
+            answer_data = self._answer(question, user_type, experience, knowledge_base)
+        else:
+            with span(ANSWER_STAGE_SECONDS, stage='normalize'):
+                key = (normalize_question(question), user_type, experience)
+            version = knowledge_base.version
+            answer_data = self.cache.get(key, version)
+            if answer_data is None:
+                answer_data = self._answer(question, user_type, experience, knowledge_base)
+                # The generic fallback quotes the question verbatim, so only
+                # cache answers that are the same for every spelling of it
+                if not answer_data['fallback']:
+                    self.cache.put(key, version, answer_data)
+            answer_data = dict(answer_data, question=question)
+
+        QUESTIONS_ANSWERED.inc()
+        if answer_data['fallback']:
+            FALLBACK_ANSWERS.inc()
+        return answer_data
+
+    def topic_answer(self, topic_id, user_type=DEFAULT_USER_TYPE, experience=DEFAULT_EXPERIENCE):
+        """Answer for a known topic, e.g. to replay history"""
+        answer_data = self.knowledge_base.topic_answer(topic_id, user_type=user_type,
+                                                       experience=experience)
+        answer_data['user_type'] = user_type
+        answer_data['experience'] = experience
+        return answer_data
+
+    def replay(self, record):
+        """Rebuild the answer to a history record from what it references
+
+        Nothing is searched, cached or counted, so showing past questions
+        leaves the cache and answer metrics alone.
+        """
+        knowledge_base = self.knowledge_base
+        if record.topic_id in knowledge_base.topics:
+            return self.topic_answer(record.topic_id, record.user_type, record.experience)
+        hits = None
+        if record.passages and self.passage_index is not None:
+            hits = self.passage_index.lookup(record.passages)
+        if hits:
+            from retrieval import passages_answer
+            answer_data = passages_answer(hits)
+            answer_data['answer'] = render(answer_data['answer'], record.user_type, record.experience)
+        else:
+            # A removed topic or the generic fallback, from the current content
+            answer_data = knowledge_base.answer(record.question, record.user_type, record.experience)
+        answer_data['question'] = record.question
+        answer_data['user_type'] = record.user_type
+        answer_data['experience'] = record.experience
+        return answer_data
+
+    def _answer(self, question, user_type, experience, knowledge_base):
+        # Topic and fallback answers come back already rendered for the audience
+        with span(ANSWER_STAGE_SECONDS, stage='match'):
+            answer_data = knowledge_base.answer(question, user_type, experience)
+
+            # Fall back to imported guideline passages before the generic answer
+            hits = None
+            if answer_data['topic_id'] is None and self.passage_index is not None:
+                hits = self.passage_index.search(question, k=3)
+
+        # Passage answers are assembled per question, so only they are rendered here
+        if hits:
+            from retrieval import passages_answer
+            with span(ANSWER_STAGE_SECONDS, stage='customize'):
+                answer_data = passages_answer(hits)
+                answer_data['answer'] = render(answer_data['answer'], user_type, experience)
+        answer_data['question'] = question
+        answer_data['user_type'] = user_type
+        answer_data['experience'] = experience
+        return answer_data
+
+    def answer_batch(self, pairs):
+        """Answer an iterable of (question, user_type) or (question, user_type, experience)"""
+        return [self.answer(*pair) for pair in pairs]
+
+
+_worker_answerer = None
+
+
+def _init_worker(index_dir):
+    global _worker_answerer
+    _worker_answerer = Answerer(KnowledgeBase(TOPICS), load_passage_index(index_dir),
+                                AnswerCache())
+
+
+def _answer_record(record):
+    result = dict(record)
+    result.update(_worker_answerer.answer(record['question'],
+                                          record.get('user_type', DEFAULT_USER_TYPE),
+                                          record.get('experience', DEFAULT_EXPERIENCE)))
+    return result
+
+
+def answer_records(records, workers=1, index_dir=None, chunksize=64):
+    """Yield answered copies of question records, in input order
+
+    With more than one worker the records are streamed through a process
+    pool; every worker builds its own knowledge base and maps the index.
+    """
+    if workers <= 1:
+        _init_worker(index_dir)
+        yield from map(_answer_record, records)
+        return
+    with multiprocessing.Pool(workers, _init_worker, (index_dir,)) as pool:
+        yield from pool.imap(_answer_record, records, chunksize)
+
+
+def answer_questions(pairs, workers=None, index_dir=None):
+    """Answer a batch of (question, user_type) pairs and return answer dicts"""
+    records = [{'question': q, 'user_type': u} for q, u in pairs]
+    if workers is None:
+        workers = os.cpu_count() if len(records) >= POOL_THRESHOLD else 1
+    return list(answer_records(records, workers, index_dir))
+
+
+def _read_records(f):
+    for line in f:
+        if line.strip():
+            yield json.loads(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of diabetes questions")
+    parser.add_argument('questions', help="JSONL input, '-' for stdin")
+    parser.add_argument('-o', '--output', help="JSONL output (default stdout)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help="process pool size, 1 to answer in-process")
+    parser.add_argument('--corpus-index', help="guideline passage index directory")
+    args = parser.parse_args(argv)
+    for error in TOPIC_ERRORS.values():
+        print(f"Skipping topic file: {error}", file=sys.stderr)
+
+    source = sys.stdin if args.questions == '-' else open(args.questions, encoding='utf-8')
+    sink = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    start = time.perf_counter()
+    count = fallbacks = 0
+    try:
+        for result in answer_records(_read_records(source), args.workers, args.corpus_index):
+            sink.write(json.dumps(result, ensure_ascii=False) + '\n')
+            count += 1
+            fallbacks += result['topic_id'] is None
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    elapsed = time.perf_counter() - start
+    print(f"Answered {count} questions ({fallbacks} without a topic match) "
+          f"in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
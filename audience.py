@@ -0,0 +1,68 @@
+# audience.py
+"""Answer renderings for each user type and experience level
+
+Topic answers are rendered for every (user type, experience) pair once,
+when the knowledge base is built, so answering a question is a lookup.
+Patients and caregivers who are new to diabetes get the topic's authored
+plain-language text when it has one, and healthcare professionals (or any
+user at the Professional level) its authored dense text; nothing is cut
+automatically, since what a reader can skip is a clinical judgement.
+"""
+
+USER_TYPES = ("Patient", "Healthcare Professional", "Caregiver", "Student")
+EXPERIENCE_LEVELS = ("Newly Diagnosed", "1-5 Years", "5+ Years", "Professional")
+
+DEFAULT_USER_TYPE = "Patient"
+DEFAULT_EXPERIENCE = "Newly Diagnosed"
+
+HEADERS = {
+    "Patient": "**Patient Education**",
+    "Healthcare Professional": "**Clinical Perspective - Healthcare Professional**",
+    "Caregiver": "**Caregiver Guide - Supporting Someone with Diabetes**",
+    "Student": "**Study Notes - Clinical Summary**"
+}
+
+# Headers used instead when the simplified text is shown
+SIMPLIFIED_HEADERS = {
+    "Patient": "**Patient Education - Simplified Explanation**"
+}
+
+SIMPLIFIED_USER_TYPES = ("Patient", "Caregiver")
+SIMPLIFIED_EXPERIENCE_LEVELS = ("Newly Diagnosed", "1-5 Years")
+
+def render(answer, user_type, experience=DEFAULT_EXPERIENCE, simplified=None,
+           professional=None):
+    """An answer as shown to one audience, with its header
+
+    ``simplified`` and ``professional`` are the topic's authored
+    plain-language and dense texts, if any.
+    """
+    header = HEADERS.get(user_type)
+    if user_type == "Healthcare Professional" or experience == "Professional":
+        body = (professional or answer).strip()
+    elif (simplified and user_type in SIMPLIFIED_USER_TYPES
+          and experience in SIMPLIFIED_EXPERIENCE_LEVELS):
+        body = simplified.strip()
+        header = SIMPLIFIED_HEADERS.get(user_type, header)
+    else:
+        body = answer.strip()
+    return f"{header}\n\n{body}" if header else body
+
+
+def render_variants(answer, authored=None, simplified=None, professional=None):
+    """Renderings for every (user type, experience) pair
+
+    ``authored`` maps user types to hand-written answers that replace
+    ``answer`` for that audience before rendering. Pairs that render the
+    same text share one string, so a topic keeps only its distinct
+    renderings.
+    """
+    authored = authored or {}
+    distinct = {}
+    variants = {}
+    for user_type in USER_TYPES:
+        for experience in EXPERIENCE_LEVELS:
+            text = render(authored.get(user_type, answer), user_type, experience,
+                          simplified, professional)
+            variants[(user_type, experience)] = distinct.setdefault(text, text)
+    return variants
@@ -0,0 +1,204 @@
+# benchmarks/bench_app.py
+"""Offline performance benchmarks for the Streamlit app
+
+    python benchmarks/bench_app.py -o results.json
+    python benchmarks/bench_app.py -o new.json --baseline results.json --threshold 0.2
+
+Measures cold and warm rerun time of every section through Streamlit's
+AppTest harness, question-answering throughput over a synthetic corpus,
+and session_state growth per question asked. Results are written as JSON;
+with --baseline, metrics that regressed by more than --threshold are
+reported and the exit status is 1.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from types import FunctionType, ModuleType
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+APP_PATH = os.path.join(ROOT, 'diabetes_app.py')
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+from answering import AnswerCache, Answerer  # noqa: E402
+from audience import USER_TYPES  # noqa: E402
+from knowledge_base import KnowledgeBase, TOPICS  # noqa: E402
+
+SECTIONS = ("🏠 Dashboard", "📊 Health Overview", "💬 Clinical Q&A", "📚 Resources")
+
+QUESTION_TEMPLATES = (
+    "What should I know about {}?",
+    "Can you explain {} for someone newly diagnosed?",
+    "How does {} affect my diabetes management?",
+    "Latest guidance on {} please",
+)
+
+
+def synthetic_questions(count):
+    """Deterministic, repeating mix of topic questions and unmatched questions"""
+    terms = [term for topic in TOPICS for term in topic['keywords'] + topic.get('synonyms', [])]
+    terms += ["travel insurance", "sleep quality", "dental visits", "vaccination schedule"]
+    return [QUESTION_TEMPLATES[i % len(QUESTION_TEMPLATES)].format(terms[i % len(terms)])
+            for i in range(count)]
+
+
+def deep_sizeof(obj):
+    """Bytes reachable from obj, not counting modules, classes and functions"""
+    seen = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        current = stack.pop()
+        if id(current) in seen or isinstance(current, (type, ModuleType, FunctionType)):
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        stack.extend(gc.get_referents(current))
+    return total
+
+
+def new_app():
+    return AppTest.from_file(APP_PATH, default_timeout=120)
+
+
+def timed_run(at):
+    start = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - start) * 1000
+    if at.exception:
+        raise RuntimeError(f"App raised: {at.exception[0].value}")
+    return elapsed
+
+
+def bench_reruns(repeats):
+    """Cold (first render in a new session) and warm rerun time per section"""
+    results = {}
+    for section in SECTIONS:
+        at = new_app()
+        at.run()
+        at.radio(key='section').set_value(section)
+        cold = timed_run(at)
+        warm = [timed_run(at) for _ in range(repeats)]
+        results[section] = {'cold_ms': cold, 'warm_ms': statistics.median(warm)}
+    return results
+
+
+def bench_answering(count):
+    """Questions per second through the headless answering path"""
+    questions = synthetic_questions(count)
+    pairs = [(q, USER_TYPES[i % len(USER_TYPES)]) for i, q in enumerate(questions)]
+    knowledge_base = KnowledgeBase(TOPICS)
+    results = {}
+    for label, cache in (('uncached', None), ('cached', AnswerCache())):
+        answerer = Answerer(knowledge_base, cache=cache)
+        answerer.answer_batch(pairs[:100])  # warm up
+        start = time.perf_counter()
+        answerer.answer_batch(pairs)
+        results[label] = count / (time.perf_counter() - start)
+    return results
+
+
+def bench_session_memory(questions):
+    """session_state size before and after asking questions through the Q&A tab"""
+    at = new_app()
+    at.run()
+    at.radio(key='section').set_value("💬 Clinical Q&A")
+    at.run()
+    before = deep_sizeof(at.session_state.to_dict())
+    start = time.perf_counter()
+    for question in synthetic_questions(questions):
+        at.text_area[0].input(question)
+        next(b for b in at.button if "Get Clinical Answer" in b.label).click()
+        timed_run(at)
+    per_question_ms = (time.perf_counter() - start) * 1000 / questions
+    after = deep_sizeof(at.session_state.to_dict())
+    return {
+        'before_bytes': before,
+        'after_bytes': after,
+        'bytes_per_question': (after - before) / questions,
+        'process_question_rerun_ms': per_question_ms
+    }
+
+
+def metric(value, unit, better='lower'):
+    return {'value': value, 'unit': unit, 'better': better}
+
+
+def run_benchmarks(args):
+    metrics = {}
+    for section, times in bench_reruns(args.repeats).items():
+        name = section.split(' ', 1)[1]
+        metrics[f"rerun.cold.{name}"] = metric(times['cold_ms'], 'ms')
+        metrics[f"rerun.warm.{name}"] = metric(times['warm_ms'], 'ms')
+    for label, rate in bench_answering(args.questions).items():
+        metrics[f"answering.{label}"] = metric(rate, 'questions/s', 'higher')
+    memory = bench_session_memory(args.session_questions)
+    metrics['session.bytes_per_question'] = metric(memory['bytes_per_question'], 'bytes')
+    metrics['session.after_bytes'] = metric(memory['after_bytes'], 'bytes')
+    metrics['session.process_question_rerun'] = metric(memory['process_question_rerun_ms'], 'ms')
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'metrics': metrics
+    }
+
+
+def regressions(current, baseline, threshold):
+    """Metrics that got worse than the baseline by more than threshold (a fraction)"""
+    found = []
+    for name, new in current['metrics'].items():
+        old = baseline['metrics'].get(name)
+        if not old or not old['value']:
+            continue
+        change = (new['value'] - old['value']) / old['value']
+        if new['better'] == 'higher':
+            change = -change
+        if change > threshold:
+            found.append((name, old['value'], new['value'], change))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark rerun latency, Q&A throughput and session memory")
+    parser.add_argument('-o', '--output', help="write results JSON here (default stdout)")
+    parser.add_argument('--baseline', help="results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="allowed regression as a fraction (default 0.2)")
+    parser.add_argument('--repeats', type=int, default=5, help="warm reruns per section")
+    parser.add_argument('--questions', type=int, default=20000,
+                        help="synthetic questions for the throughput benchmark")
+    parser.add_argument('--session-questions', type=int, default=50,
+                        help="questions asked through AppTest for the memory benchmark")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    for name, value in results['metrics'].items():
+        print(f"{name:45s} {value['value']:14.2f} {value['unit']}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.threshold)
+        for name, old, new, change in found:
+            print(f"REGRESSION {name}: {old:.2f} -> {new:.2f} ({change:+.0%})", file=sys.stderr)
+        if found:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+# benchmarks/load_test.py
+"""Concurrent-session load test against a locally started Streamlit server
+
+    python benchmarks/load_test.py --sessions 1,10,25,50 --duration 30 -o load.json
+
+Starts ``streamlit run diabetes_app.py`` on a free local port and, for each
+session count N, connects N simulated browsers to its websocket. Each
+session speaks Streamlit's protobuf protocol: it sends a rerun BackMsg with
+its widget states and waits for the script_finished ForwardMsg, mixing tab
+switches, common-question clicks and custom questions in the Q&A tab.
+Reported per N: p50/p95/p99 rerun latency, reruns per second, errors and
+the server's resident memory, so the knee of the curve shows up here first.
+
+Needs the benchmark-only dependencies: pip install -r benchmarks/requirements.txt
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+from bench_app import APP_PATH, SECTIONS, metric, synthetic_questions
+
+QA_SECTION = "💬 Clinical Q&A"
+QUESTION_LABEL = "Type your diabetes-related question:"
+ASK_LABEL = "Get Clinical Answer"
+QUICK_KEYS = tuple(f"quick_{i}" for i in range(6))
+
+# Relative weights of the simulated user actions
+ACTIONS = (('switch_tab', 4), ('quick_question', 3), ('custom_question', 3))
+
+# Widget value fields set from Python values; everything else keeps its default
+VALUE_FIELDS = {'radio': 'string_value', 'text_area': 'string_value', 'button': 'trigger_value'}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, env=None):
+    """Run the app headless on port and wait until it answers health checks"""
+    command = [sys.executable, '-m', 'streamlit', 'run', APP_PATH,
+               '--server.headless', 'true', '--server.port', str(port),
+               '--server.address', '127.0.0.1', '--browser.gatherUsageStats', 'false']
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                              env=dict(os.environ, **(env or {})))
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"streamlit exited with status {server.returncode}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("streamlit did not become healthy within 60 seconds")
+
+
+def rss_bytes(pid):
+    """Resident set size of a process, from /proc (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class Session:
+    """One simulated browser tab: a websocket plus the widget states it would send"""
+
+    def __init__(self, url, rng):
+        self.url = url
+        self.rng = rng
+        self.ws = None
+        self.widgets = {}  # label or key -> (widget id, element type)
+        self.values = {}   # widget id -> (field, value) sent on every rerun
+        self.section = SECTIONS[0]
+        self.latencies = []
+        self.errors = 0
+
+    async def connect(self):
+        self.ws = await websockets.connect(self.url, subprotocols=['streamlit'], max_size=None)
+        await self.rerun()
+
+    async def close(self):
+        await self.ws.close()
+
+    def _widget_states(self, triggers):
+        message = BackMsg()
+        client_state = message.rerun_script
+        client_state.query_string = ''
+        for widget_id, (field, value) in list(self.values.items()) + list(triggers.items()):
+            state = client_state.widget_states.widgets.add()
+            state.id = widget_id
+            setattr(state, field, value)
+        return message.SerializeToString()
+
+    def _record_widget(self, element_type, element):
+        widget_id = element.id
+        key = widget_id.rsplit('-', 1)[-1]
+        self.widgets[key if key != 'None' else element.label] = (widget_id, element_type)
+
+    async def rerun(self, triggers=None):
+        """Send one rerun and wait for the script to finish; returns latency in ms"""
+        start = time.perf_counter()
+        await self.ws.send(self._widget_states(triggers or {}))
+        self.widgets = {}
+        while True:
+            message = ForwardMsg()
+            message.ParseFromString(await self.ws.recv())
+            kind = message.WhichOneof('type')
+            if kind == 'delta' and message.delta.WhichOneof('type') == 'new_element':
+                element_type = message.delta.new_element.WhichOneof('type')
+                if element_type == 'exception':
+                    self.errors += 1
+                elif element_type in VALUE_FIELDS:
+                    self._record_widget(element_type, getattr(message.delta.new_element, element_type))
+            elif kind == 'script_finished':
+                if message.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    continue
+                if message.script_finished == ForwardMsg.FINISHED_WITH_COMPILE_ERROR:
+                    self.errors += 1
+                break
+        elapsed = (time.perf_counter() - start) * 1000
+        self.latencies.append(elapsed)
+
+        # Like the frontend, only widgets drawn in this run keep sending state
+        live = {widget_id for widget_id, _ in self.widgets.values()}
+        self.values = {widget_id: value for widget_id, value in self.values.items() if widget_id in live}
+        return elapsed
+
+    def _widget_id(self, name):
+        for label, (widget_id, _) in self.widgets.items():
+            if name in label:
+                return widget_id
+        raise KeyError(f"no widget matching {name!r} in {self.section}")
+
+    async def switch_tab(self, section=None):
+        if section is None:
+            section = self.rng.choice([s for s in SECTIONS if s != self.section])
+        self.values[self._widget_id('section')] = ('string_value', section)
+        self.section = section
+        await self.rerun()
+
+    async def quick_question(self):
+        if self.section != QA_SECTION:
+            await self.switch_tab(QA_SECTION)
+        await self.rerun({self._widget_id(self.rng.choice(QUICK_KEYS)): ('trigger_value', True)})
+
+    async def custom_question(self, question):
+        if self.section != QA_SECTION:
+            await self.switch_tab(QA_SECTION)
+        self.values[self._widget_id(QUESTION_LABEL)] = ('string_value', question)
+        await self.rerun({self._widget_id(ASK_LABEL): ('trigger_value', True)})
+
+
+async def drive_session(session, deadline, questions, think_time):
+    names, weights = zip(*ACTIONS)
+    while time.perf_counter() < deadline:
+        action = session.rng.choices(names, weights)[0]
+        try:
+            if action == 'custom_question':
+                await session.custom_question(session.rng.choice(questions))
+            else:
+                await getattr(session, action)()
+        except (KeyError, websockets.ConnectionClosed):
+            session.errors += 1
+            return
+        if think_time:
+            await asyncio.sleep(session.rng.uniform(0, 2 * think_time))
+
+
+async def sample_rss(pid, samples, stop):
+    while not stop.is_set():
+        samples.append(rss_bytes(pid))
+        try:
+            await asyncio.wait_for(stop.wait(), 0.25)
+        except asyncio.TimeoutError:
+            pass
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def run_step(url, pid, count, duration, questions, think_time, seed):
+    """Drive count concurrent sessions for duration seconds"""
+    sessions = [Session(url, random.Random(seed + i)) for i in range(count)]
+    await asyncio.gather(*(session.connect() for session in sessions))
+    for session in sessions:
+        session.latencies = []  # the first page load is not part of the mix
+
+    samples, stop = [], asyncio.Event()
+    sampler = asyncio.create_task(sample_rss(pid, samples, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(drive_session(session, start + duration, questions, think_time)
+                           for session in sessions))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await sampler
+    await asyncio.gather(*(session.close() for session in sessions), return_exceptions=True)
+
+    latencies = [ms for session in sessions for ms in session.latencies]
+    samples = [rss for rss in samples if rss is not None]
+    if not latencies:
+        raise RuntimeError(f"no reruns completed with {count} sessions")
+    return {
+        'sessions': count,
+        'reruns': len(latencies),
+        'errors': sum(session.errors for session in sessions),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'mean_ms': statistics.fmean(latencies),
+        'rss_bytes': samples[-1] if samples else None,
+        'peak_rss_bytes': max(samples) if samples else None
+    }
+
+
+async def run_load_test(args, port, pid):
+    url = f"ws://127.0.0.1:{port}/_stcore/stream"
+    questions = synthetic_questions(1000)
+    steps = []
+    for count in args.sessions:
+        step = await run_step(url, pid, count, args.duration, questions, args.think_time, args.seed)
+        steps.append(step)
+        print(f"{count:5d} sessions  {step['throughput']:8.1f} reruns/s  "
+              f"p50 {step['p50_ms']:7.1f}  p95 {step['p95_ms']:7.1f}  p99 {step['p99_ms']:7.1f} ms  "
+              f"rss {(step['rss_bytes'] or 0) / 2**20:7.1f} MiB  errors {step['errors']}",
+              file=sys.stderr)
+    return steps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the app with concurrent simulated sessions")
+    parser.add_argument('--sessions', default='1,5,10,25,50',
+                        type=lambda text: [int(n) for n in text.split(',')],
+                        help="comma-separated concurrent session counts (default 1,5,10,25,50)")
+    parser.add_argument('--duration', type=float, default=20, help="seconds per session count")
+    parser.add_argument('--think-time', type=float, default=0.0,
+                        help="mean pause between a session's actions in seconds (default 0)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--port', type=int, help="server port (default: a free port)")
+    parser.add_argument('-o', '--output', help="write results JSON here (default stdout)")
+    args = parser.parse_args(argv)
+
+    port = args.port or free_port()
+    server = start_server(port)
+    try:
+        steps = asyncio.run(run_load_test(args, port, server.pid))
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    metrics = {}
+    for step in steps:
+        prefix = f"load.{step['sessions']}"
+        metrics[f"{prefix}.p50"] = metric(step['p50_ms'], 'ms')
+        metrics[f"{prefix}.p95"] = metric(step['p95_ms'], 'ms')
+        metrics[f"{prefix}.p99"] = metric(step['p99_ms'], 'ms')
+        metrics[f"{prefix}.throughput"] = metric(step['throughput'], 'reruns/s', 'higher')
+        if step['rss_bytes'] is not None:
+            metrics[f"{prefix}.rss"] = metric(step['rss_bytes'], 'bytes')
+    results = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'duration': args.duration,
+        'think_time': args.think_time,
+        'steps': steps,
+        'metrics': metrics
+    }
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+# clinic.py
+"""Population analytics over a panel of patients stored one partition per patient
+
+Each patient is a columnar ``<patient_id>.npz`` file holding 'timestamps'
+(epoch seconds) and 'mgdl' arrays. Per-patient metrics are cached in the
+panel directory and recomputed only for partitions whose file changed.
+Panels are the subdirectories of a clinic root (or the root itself).
+"""
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from analytics import glycemic_summary
+
+PARTITION_SUFFIX = '.npz'
+CACHE_FILE = '.panel_metrics.json'
+
+# Fewer changed partitions than this are summarized in-process
+POOL_THRESHOLD = 16
+
+# Workers are not forked from the (multithreaded) app server process
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Worst time below range first, then worst time above range
+RISK_ORDER = ('time_below_range', 'time_above_range')
+
+
+def write_partition(directory, patient_id, timestamps, mgdl):
+    """Store one patient's readings as a columnar partition"""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, patient_id + PARTITION_SUFFIX)
+    temporary = path + '.tmp.npz'
+    np.savez(temporary, timestamps=np.asarray(timestamps, dtype=np.int64),
+             mgdl=np.asarray(mgdl, dtype=np.float32))
+    os.replace(temporary, path)  # readers never see a half-written partition
+
+
+def _stamp(entry):
+    stat = entry.stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def scan_partitions(directory):
+    """Map patient_id -> (path, change stamp) for every partition in a panel"""
+    partitions = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(PARTITION_SUFFIX) and not entry.name.endswith('.tmp.npz'):
+                partitions[entry.name[:-len(PARTITION_SUFFIX)]] = (entry.path, _stamp(entry))
+    return partitions
+
+
+def list_panels(root):
+    """Names of the panels under a clinic root, '.' standing for the root itself"""
+    panels = sorted(entry.name for entry in os.scandir(root)
+                    if entry.is_dir() and not entry.name.startswith('.'))
+    if scan_partitions(root):
+        panels.insert(0, '.')
+    return panels
+
+
+def panel_path(root, name):
+    """Directory of a named panel; raises ValueError if it resolves outside root"""
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or not os.path.isdir(path):
+        raise ValueError(f"{name!r} is not a panel under the clinic directory")
+    return path
+
+
+def summarize_partition(path):
+    """Glycemic metrics for one patient partition"""
+    with np.load(path) as data:
+        timestamps, mgdl = data['timestamps'], data['mgdl']
+    metrics = glycemic_summary(timestamps, mgdl) or {'readings': 0}
+    metrics.pop('ranges', None)
+    metrics['last_reading'] = int(timestamps[-1]) if len(timestamps) else None
+    return metrics
+
+
+def _summarize_or_error(path):
+    """(metrics, None) for a partition, or (None, error) if it cannot be read"""
+    try:
+        return summarize_partition(path), None
+    except Exception as e:
+        # Truncated, pickled or otherwise corrupt files must not sink the whole panel
+        return None, f"{type(e).__name__}: {e}"
+
+
+def _load_cache(directory):
+    try:
+        with open(os.path.join(directory, CACHE_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(directory, cache):
+    path = os.path.join(directory, CACHE_FILE)
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(path + '.tmp', path)
+
+
+def panel_fingerprint(directory):
+    """Changes whenever any partition in the panel is added, removed or rewritten"""
+    stamps = sorted((pid, stamp) for pid, (_, stamp) in scan_partitions(directory).items())
+    return hashlib.sha1(json.dumps(stamps).encode('utf-8')).hexdigest()
+
+
+def risk_key(row):
+    return tuple(-(row.get(column) or 0.0) for column in RISK_ORDER)
+
+
+def refresh_panel(directory, workers=None, progress=None):
+    """Per-patient metrics for a panel, sorted by risk, recomputing only changed partitions
+
+    Returns (rows, stats) where stats reports how many partitions were
+    recomputed and how long the refresh took, the partitions that could not
+    be read ('errors', patient_id -> message; cached like metrics until the
+    file changes) and whether the metrics cache could not be written
+    ('cache_error', e.g. on a read-only share). ``progress(done, total)`` is
+    called as changed partitions finish and may raise to abort the refresh.
+    """
+    start = time.perf_counter()
+    partitions = scan_partitions(directory)
+    stored = _load_cache(directory)
+    cache = {pid: entry for pid, entry in stored.items()
+             if pid in partitions and entry['stamp'] == partitions[pid][1]}
+    changed = [pid for pid in partitions if pid not in cache]
+
+    paths = [partitions[pid][0] for pid in changed]
+    pool = None
+    try:
+        if len(paths) >= POOL_THRESHOLD and workers != 1:
+            pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(POOL_START_METHOD))
+            results = pool.map(_summarize_or_error, paths, chunksize=max(1, len(paths) // 64))
+        else:
+            results = map(_summarize_or_error, paths)
+        for done, (pid, (metrics, error)) in enumerate(zip(changed, results), 1):
+            if error is None:
+                cache[pid] = {'stamp': partitions[pid][1], 'metrics': metrics}
+            else:
+                cache[pid] = {'stamp': partitions[pid][1], 'error': error}
+            if progress is not None:
+                progress(done, len(changed))
+    finally:
+        # A progress callback may abort the refresh: drop queued work but keep
+        # the patients already summarized for next time
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        cache_error = None
+        if changed or len(cache) != len(stored):
+            try:
+                _save_cache(directory, cache)
+            except OSError as e:
+                # Only costs a recompute next time
+                cache_error = str(e)
+
+    rows = [dict(entry['metrics'], patient_id=pid) for pid, entry in cache.items()
+            if 'metrics' in entry]
+    rows.sort(key=risk_key)
+    stats = {
+        'patients': len(rows),
+        'recomputed': len(changed),
+        'seconds': time.perf_counter() - start,
+        'errors': {pid: entry['error'] for pid, entry in cache.items() if 'error' in entry},
+        'cache_error': cache_error
+    }
+    return rows, stats
@@ -0,0 +1,2 @@
+# conftest.py
+# Puts the repository root on sys.path so tests/ can import the app modules
@@ -1,556 +1,832 @@
-# diabetes_management_app.py
-import streamlit as st
-import pandas as pd
-import numpy as np
-from datetime import datetime
-
-# Page configuration - MUST BE FIRST
-st.set_page_config(
-    page_title="Diabetes Management Assistant",
-    page_icon="🩺",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-# Initialize session state
-if 'conversation_history' not in st.session_state:
-    st.session_state.conversation_history = []
-if 'user_info' not in st.session_state:
-    st.session_state.user_info = {}
-
-def main():
-    # Sidebar for user information
-    with st.sidebar:
-        st.header("👤 User Profile")
-        st.session_state.user_info['type'] = st.selectbox(
-            "I am a:",
-            ["Patient", "Healthcare Professional", "Caregiver", "Student"]
-        )
-        st.session_state.user_info['experience'] = st.selectbox(
-            "Diabetes Experience:",
-            ["Newly Diagnosed", "1-5 Years", "5+ Years", "Professional"]
-        )
-        
-        st.markdown("---")
-        st.header("📋 Navigation")
-        # Simple navigation using markdown
-        st.markdown("""
-        **Main Sections:**
-        - 🏠 Dashboard
-        - 📊 Health Overview  
-        - 💬 Clinical Q&A
-        - 📚 Resources
-        """)
-        
-        st.markdown("---")
-        st.header("🆘 Emergency Info")
-        st.error("""
-        **Low Blood Sugar Emergency:**
-        - Symptoms: Shaking, sweating, confusion
-        - Action: 15g fast carbs + recheck in 15min
-        
-        **Call your doctor or 911 for emergencies**
-        """)
-
-    # Main content
-    st.title("🩺 Diabetes Management Assistant")
-    st.markdown("### *Evidence-Based Clinical Decision Support System*")
-    
-    # Create tabs
-    tab1, tab2, tab3, tab4 = st.tabs(["🏠 Dashboard", "📊 Health Overview", "💬 Clinical Q&A", "📚 Resources"])
-    
-    with tab1:
-        show_dashboard()
-    
-    with tab2:
-        show_health_overview()
-    
-    with tab3:
-        show_qa_system()
-    
-    with tab4:
-        show_resources()
-
-def show_dashboard():
-    """Show main dashboard with overview"""
-    st.header("🏠 Diabetes Management Dashboard")
-    
-    # Key metrics row
-    st.subheader("🎯 Key Clinical Metrics")
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.metric("HbA1c Target", "<7.0%", "ADA Guideline")
-    with col2:
-        st.metric("Fasting Glucose", "80-130 mg/dL", "Optimal Range")
-    with col3:
-        st.metric("Post-Meal", "<180 mg/dL", "2 hours after")
-    with col4:
-        st.metric("Blood Pressure", "<140/90 mmHg", "Target")
-    
-    # Management pillars
-    st.subheader("🎯 Management Pillars")
-    pillars = st.columns(5)
-    
-    pillar_data = [
-        ("💊", "Medication", "Take as prescribed"),
-        ("🥗", "Nutrition", "Balanced diet"),
-        ("🏃", "Exercise", "150 mins/week"),
-        ("📊", "Monitoring", "Regular checks"),
-        ("🎓", "Education", "Continuous learning")
-    ]
-    
-    for i, (icon, title, desc) in enumerate(pillar_data):
-        with pillars[i]:
-            st.markdown(f"""
-            <div style='text-align: center; padding: 15px; background: #e8f4f8; border-radius: 10px; margin: 5px;'>
-                <h2>{icon}</h2>
-                <strong>{title}</strong><br>
-                <small>{desc}</small>
-            </div>
-            """, unsafe_allow_html=True)
-    
-    # Quick actions
-    st.subheader("🚀 Quick Actions")
-    action_cols = st.columns(4)
-    
-    actions = [
-        ("📝", "Log Blood Sugar", "Record glucose reading"),
-        ("💊", "Medication Info", "Learn about treatments"),
-        ("🥗", "Meal Planning", "Diet recommendations"),
-        ("📈", "View Trends", "See progress over time")
-    ]
-    
-    for i, (icon, title, desc) in enumerate(actions):
-        with action_cols[i]:
-            if st.button(f"{icon} {title}", use_container_width=True, help=desc):
-                st.info(f"**{title}** feature would open here. This is a demonstration.")
-    
-    # Recent activity
-    st.subheader("📋 Today's Summary")
-    summary_cols = st.columns(3)
-    
-    with summary_cols[0]:
-        st.markdown("**Glucose Checks**")
-        st.write("✅ 2 completed today")
-        st.write("🕒 Last: 120 mg/dL")
-    
-    with summary_cols[1]:
-        st.markdown("**Medications**")
-        st.write("✅ All taken today")
-        st.write("💊 Metformin 500mg")
-    
-    with summary_cols[2]:
-        st.markdown("**Activity**")
-        st.write("🏃 30 mins walking")
-        st.write("🥗 Meals logged: 2")
-
-def show_health_overview():
-    """Show health metrics and diagrams"""
-    st.header("📊 Diabetes Health Overview")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("🩸 Blood Glucose Ranges")
-        
-        # Glucose range visualization
-        glucose_ranges = pd.DataFrame({
-            'Range': ['Normal', 'Prediabetes', 'Diabetes', 'Critical'],
-            'Min': [70, 100, 126, 200],
-            'Max': [99, 125, 199, 400]
-        })
-        
-        # Display as a table with color coding
-        st.dataframe(glucose_ranges, use_container_width=True)
-        
-        st.subheader("📈 Sample Glucose Monitoring")
-        # Sample glucose data throughout day
-        time_data = pd.DataFrame({
-            'Time': ['6 AM', '9 AM', '12 PM', '3 PM', '6 PM', '9 PM', '12 AM'],
-            'Glucose': [95, 150, 140, 130, 120, 110, 100]
-        })
-        st.line_chart(time_data.set_index('Time'))
-    
-    with col2:
-        st.subheader("🔬 Diabetes Statistics")
-        
-        # Diabetes statistics
-        diabetes_stats = pd.DataFrame({
-            'Type': ['Type 2', 'Type 1', 'Prediabetes', 'Gestational'],
-            'Percentage': [90, 5, 38, 2],
-            'Description': ['Most common', 'Autoimmune', 'At risk', 'Pregnancy']
-        })
-        st.dataframe(diabetes_stats, use_container_width=True)
-        
-        st.subheader("🎯 HbA1c Targets by Group")
-        hba1c_data = pd.DataFrame({
-            'Group': ['Most Adults', 'Elderly', 'Children', 'Pregnant'],
-            'Target HbA1c': [6.5, 7.5, 7.0, 6.1],
-            'Range': ['<7.0%', '<8.0%', '<7.5%', '<6.5%']
-        })
-        st.dataframe(hba1c_data, use_container_width=True)
-        
-        # Visual indicators
-        st.subheader("📊 Risk Indicators")
-        risk_cols = st.columns(3)
-        with risk_cols[0]:
-            st.metric("Heart Disease Risk", "2.5x", "Higher with diabetes")
-        with risk_cols[1]:
-            st.metric("Kidney Disease", "40%", "Of diabetics affected")
-        with risk_cols[2]:
-            st.metric("Annual Eye Exams", "Recommended", "For all patients")
-
-def show_qa_system():
-    """Show the question-answering system"""
-    st.header("💬 Clinical Question & Answer System")
-    st.markdown("### *Get evidence-based answers to your diabetes questions*")
-    
-    # User context
-    user_type = st.session_state.user_info.get('type', 'Patient')
-    experience = st.session_state.user_info.get('experience', 'Newly Diagnosed')
-    
-    st.info(f"👤 **Session for**: {user_type} | **Experience**: {experience}")
-    
-    # Quick question buttons
-    st.subheader("🚀 Common Questions")
-    
-    col1, col2 = st.columns(2)
-    
-    common_questions = {
-        "Blood Sugar": "What are the target blood sugar ranges for diabetes?",
-        "Medication": "What is the first-line medication for type 2 diabetes?",
-        "Diet": "What foods should I eat with diabetes?",
-        "Exercise": "How much exercise is recommended for diabetes management?",
-        "Symptoms": "What are the common symptoms of diabetes?",
-        "Monitoring": "How often should I check my blood sugar?"
-    }
-    
-    with col1:
-        for i, (title, question) in enumerate(list(common_questions.items())[:3]):
-            if st.button(f"🎯 {title}", key=f"quick_{i}", use_container_width=True):
-                process_question(question, user_type)
-    
-    with col2:
-        for i, (title, question) in enumerate(list(common_questions.items())[3:]):
-            if st.button(f"🎯 {title}", key=f"quick_{i+3}", use_container_width=True):
-                process_question(question, user_type)
-    
-    # Custom question input
-    st.subheader("💭 Ask Your Own Question")
-    custom_question = st.text_area(
-        "Type your diabetes-related question:",
-        placeholder="Examples:\n• What are the symptoms of low blood sugar?\n• How can I prevent diabetes complications?\n• What's the difference between type 1 and type 2?",
-        height=100
-    )
-    
-    if st.button("🎯 Get Clinical Answer", type="primary", use_container_width=True):
-        if custom_question.strip():
-            process_question(custom_question, user_type)
-        else:
-            st.warning("Please enter a question first.")
-    
-    # Conversation history
-    if st.session_state.conversation_history:
-        st.subheader("📖 Conversation History")
-        
-        for i, conversation in enumerate(reversed(st.session_state.conversation_history[-5:])):
-            with st.expander(f"💬 {conversation['question'][:50]}..."):
-                st.markdown(f"**🗣️ Question:** {conversation['question']}")
-                st.markdown(f"**🤖 Answer:** {conversation['answer']}")
-                st.markdown(f"*📅 Asked on: {conversation['timestamp'].strftime('%Y-%m-%d %H:%M')}*")
-                
-                if conversation.get('sources'):
-                    with st.expander("📚 Clinical Sources"):
-                        for source in conversation['sources']:
-                            st.write(f"• {source}")
-
-def process_question(question, user_type):
-    """Process and answer diabetes questions"""
-    # Comprehensive knowledge base
-    knowledge_base = {
-        'blood sugar': {
-            'answer': """
-**🩸 Blood Glucose Management - Clinical Guidelines**
-
-**Target Ranges (ADA Standards 2023):**
-- **Fasting/Pre-meal**: 80-130 mg/dL (4.4-7.2 mmol/L)
-- **Postprandial (1-2hr after meal)**: <180 mg/dL (<10.0 mmol/L)
-- **HbA1c (3-month average)**: <7.0% for most adults
-- **Bedtime/Overnight**: 90-150 mg/dL (5.0-8.3 mmol/L)
-
-**Individualized Targets:**
-- **Young/Healthy**: HbA1c <6.5%
-- **Elderly/Comorbidities**: HbA1c <8.0%
-- **Pregnancy**: HbA1c <6.0-6.5%
-
-**Monitoring Frequency:**
-- **Type 1**: 4-10 times daily
-- **Type 2 on insulin**: 2-4 times daily
-- **Type 2 non-insulin**: As directed by provider
-""",
-            'sources': ["ADA Standards of Care 2023", "Clinical Diabetes 2022", "Diabetes Care Journal"]
-        },
-        'medication': {
-            'answer': """
-**💊 Diabetes Pharmacotherapy - Evidence-Based Approach**
-
-**First-Line Therapy (Type 2 Diabetes):**
-- **Metformin**: Initial choice, improves insulin sensitivity
-- **Dosing**: 500-1000mg twice daily, with meals
-- **Benefits**: Weight neutral, cardiovascular safety
-
-**Second-Line Options (Individualized):**
-- **SGLT2 Inhibitors** (Empagliflozin, Dapagliflozin):
-  - Cardio-renal protection, weight loss
-  - Monitor for UTI, dehydration
-
-- **GLP-1 Receptor Agonists** (Semaglutide, Liraglutide):
-  - Significant weight loss, cardiovascular benefits
-  - GI side effects common initially
-
-- **DPP-4 Inhibitors** (Sitagliptin, Linagliptin):
-  - Weight neutral, well-tolerated
-  - Neutral cardiovascular profile
-
-**Insulin Therapy:**
-- **Basal Insulin**: Start 10 units or 0.1-0.2 units/kg
-- **Bolus Insulin**: For meal coverage as needed
-""",
-            'sources': ["ADA Pharmacotherapy Guidelines", "NEJM Diabetes Review", "Lancet Endocrinology"]
-        },
-        'diet': {
-            'answer': """
-**🥗 Medical Nutrition Therapy - Evidence-Based Approach**
-
-**Plate Method (Visual Guide):**
-- **½ Plate**: Non-starchy vegetables (broccoli, spinach, peppers)
-- **¼ Plate**: Lean protein (chicken, fish, tofu, legumes)
-- **¼ Plate**: Quality carbohydrates (whole grains, fruits)
-
-**Carbohydrate Management:**
-- **Counting**: 45-60g per meal for most adults
-- **Quality**: Emphasize low glycemic index foods
-- **Timing**: Consistent carbohydrate intake
-
-**Specific Recommendations:**
-- **Fiber**: 25-30g daily from whole foods
-- **Sodium**: <2300mg daily, <1500mg if hypertension
-- **Fats**: Emphasize unsaturated fats, limit saturated <7%
-
-**Food Choices:**
-- **Recommended**: Vegetables, whole grains, lean proteins, healthy fats
-- **Limit**: Sugary beverages, processed foods, refined grains
-""",
-            'sources': ["ADA Nutrition Guidelines", "Clinical Nutrition", "Diabetes Care"]
-        },
-        'exercise': {
-            'answer': """
-**🏃 Physical Activity - Clinical Recommendations**
-
-**Aerobic Exercise:**
-- **Frequency**: 3-7 days per week
-- **Duration**: 150 minutes moderate or 75 minutes vigorous
-- **Examples**: Brisk walking, cycling, swimming
-
-**Resistance Training:**
-- **Frequency**: 2-3 non-consecutive days weekly
-- **Types**: Weight machines, free weights, resistance bands
-- **Benefits**: Improves insulin sensitivity, preserves muscle
-
-**Flexibility & Balance:**
-- **Yoga/Tai Chi**: 2-3 times weekly for flexibility
-- **Balance exercises**: Important for elderly patients
-
-**Safety Considerations:**
-- **Pre-exercise glucose**: 100-250 mg/dL ideal range
-- **Hypoglycemia risk**: Carry fast-acting carbohydrates
-- **Foot care**: Inspect feet daily, proper footwear
-""",
-            'sources': ["ADA Exercise Guidelines", "Sports Medicine", "Clinical Exercise Physiology"]
-        },
-        'symptom': {
-            'answer': """
-**🩺 Diabetes Symptoms & Recognition**
-
-**Hyperglycemia (High Blood Sugar):**
-- **Classic Symptoms**: Polyuria, polydipsia, polyphagia
-- **Other Signs**: Fatigue, blurred vision, slow healing
-- **Severe**: Nausea/vomiting, abdominal pain, confusion
-
-**Hypoglycemia (Low Blood Sugar):**
-- **Autonomic**: Shakiness, sweating, palpitations, anxiety
-- **Neuroglycopenic**: Confusion, drowsiness, speech difficulty
-- **Severe**: Seizures, unconsciousness, coma
-
-**Long-term Complications:**
-- **Microvascular**: Retinopathy, nephropathy, neuropathy
-- **Macrovascular**: Cardiovascular disease, stroke, PAD
-
-**Screening Recommendations:**
-- **High Risk**: Screen starting at age 35, or earlier if risk factors
-- **Prediabetes**: Annual monitoring recommended
-""",
-            'sources': ["Clinical Medicine Journal", "Diabetes Symptoms Review", "Preventive Medicine"]
-        }
-    }
-    
-    # Find best matching answer
-    question_lower = question.lower()
-    answer_data = None
-    
-    for key in knowledge_base:
-        if key in question_lower:
-            answer_data = knowledge_base[key]
-            break
-    
-    if not answer_data:
-        # General answer for unmatched questions
-        answer_data = {
-            'answer': f"""
-**💡 Diabetes Management Guidance**
-
-Based on your question about *"{question}"*, here are key principles:
-
-**General Diabetes Management:**
-- **Individualized Care**: Treatment plans should be personalized
-- **Regular Monitoring**: Track blood glucose, blood pressure, weight
-- **Lifestyle Foundation**: Nutrition and exercise are cornerstone therapies
-- **Medication Adherence**: Take prescribed medications consistently
-- **Preventive Care**: Regular eye, foot, dental exams
-
-**Next Steps:**
-- Discuss specific concerns with your healthcare provider
-- Consider diabetes education programs
-- Join support groups for shared experiences
-
-*For more specific information, try asking about: blood sugar targets, medications, diet, exercise, or symptoms.*
-""",
-            'sources': ["General Diabetes Education", "Clinical Practice Guidelines"]
-        }
-    
-    # Customize answer based on user type
-    if user_type == "Healthcare Professional":
-        answer_data['answer'] = f"**Clinical Perspective - {user_type}**\n\n{answer_data['answer']}"
-    elif user_type == "Patient":
-        answer_data['answer'] = f"**Patient Education - Simplified Explanation**\n\n{answer_data['answer']}"
-    
-    # Store in conversation history
-    st.session_state.conversation_history.append({
-        'question': question,
-        'answer': answer_data['answer'],
-        'sources': answer_data['sources'],
-        'timestamp': datetime.now(),
-        'user_type': user_type
-    })
-    
-    # Display the answer
-    st.success("✅ **Clinical Answer Generated**")
-    st.markdown(answer_data['answer'])
-    
-    # Show sources in expander
-    with st.expander("📚 **Evidence Sources & References**"):
-        st.write("**Clinical Guidelines & Research:**")
-        for source in answer_data['sources']:
-            st.write(f"• {source}")
-        st.markdown("*Based on current evidence-based medicine principles*")
-
-def show_resources():
-    """Show educational resources"""
-    st.header("📚 Diabetes Educational Resources")
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("🏥 Clinical Guidelines")
-        st.markdown("""
-        **American Diabetes Association (ADA):**
-        - Standards of Medical Care in Diabetes
-        - Nutrition Therapy Recommendations
-        - Technology Standards
-        
-        **International Guidelines:**
-        - WHO Diabetes Guidelines
-        - NICE Guidelines (UK)
-        - IDF Global Diabetes Plan
-        
-        **Specialty Organizations:**
-        - AACE Comprehensive Guidelines
-        - Endocrine Society Guidelines
-        - ADA/EASD Consensus Reports
-        """)
-        
-        st.subheader("🔬 Research Databases")
-        st.markdown("""
-        **Medical Literature:**
-        - PubMed/MEDLINE
-        - Cochrane Library
-        - ClinicalTrials.gov
-        
-        **Professional Journals:**
-        - Diabetes Care
-        - The Lancet Diabetes & Endocrinology
-        - Diabetologia
-        - JAMA Diabetes Specialties
-        """)
-    
-    with col2:
-        st.subheader("📱 Patient Tools & Apps")
-        st.markdown("""
-        **Monitoring Tools:**
-        - Blood Glucose Logs
-        - Carbohydrate Counting Guides
-        - Meal Planning Templates
-        - Exercise Trackers
-        
-        **Mobile Applications:**
-        - Glucose Monitoring Apps
-        - Medication Reminders
-        - Nutrition Databases
-        - Physical Activity Guides
-        
-        **Educational Platforms:**
-        - Diabetes Self-Management Education
-        - Online Support Communities
-        - Video Learning Libraries
-        """)
-        
-        st.subheader("🎓 Professional Development")
-        st.markdown("""
-        **Continuing Education:**
-        - ADA Professional Membership
-        - Clinical Conference Updates
-        - Certification Programs
-        - Research Opportunities
-        
-        **Teaching Resources:**
-        - Patient Education Materials
-        - Clinical Decision Tools
-        - Guideline Implementation
-        - Quality Improvement
-        """)
-    
-    # Emergency section
-    st.markdown("---")
-    st.error("""
-    🚨 **MEDICAL EMERGENCY PROTOCOL**
-    
-    **For Hypoglycemia (Low Blood Sugar) Emergency:**
-    1. Check blood glucose if possible
-    2. If <70 mg/dL with symptoms: Give 15g fast-acting carbohydrate
-    3. Recheck in 15 minutes, repeat if still low
-    4. If unconscious or unable to swallow: CALL 911 IMMEDIATELY
-    5. Administer glucagon if prescribed
-    
-    **For Hyperglycemia (High Blood Sugar) Emergency:**
-    1. Check blood glucose and ketones if possible
-    2. If glucose >240 mg/dL with symptoms: Contact healthcare provider
-    3. If symptoms severe (vomiting, confusion): SEEK EMERGENCY CARE
-    4. Follow sick day management protocol
-    
-    **ALWAYS SEEK PROFESSIONAL MEDICAL HELP FOR EMERGENCIES**
-    """)
-
-# Run the application
-if __name__ == "__main__":
-    main()
+# diabetes_management_app.py
+import profiling  # first, so the startup profile sees every import below
+import streamlit as st
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime, timedelta
+from alerts import AlertEngine, DEFAULT_THRESHOLDS
+from audience import EXPERIENCE_LEVELS, USER_TYPES
+from answering import AnswerCache, Answerer, DEFAULT_CACHE_SIZE, load_passage_index
+from history import ConversationHistory, DEFAULT_LOG_DIR, prune_logs
+from jobs import JobRunner
+from knowledge_base import DEFAULT_POLL_SECONDS, KnowledgeBase, KnowledgeWatcher, load_snapshot
+import metrics
+from metrics import ACTIVE_SESSIONS, ANSWER_STAGE_SECONDS, SECTION_SECONDS, span
+from profiling import timed
+from reference_data import REFERENCE_DATA_PATH, file_stamp, load_reference_data
+from summary import DailySummary
+
+HISTORY_PAGE_SIZE = 5
+
+# NumPy and pandas (glucose, downsampling, analytics, clinic) are imported
+# inside the sections that use them: the Q&A and Resources tabs never pay for them
+
+# Page configuration - MUST BE FIRST
+st.set_page_config(
+    page_title="Diabetes Management Assistant",
+    page_icon="🩺",
+    layout="wide",
+    initial_sidebar_state="expanded"
+)
+
+# Initialize session state
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'conversation_history' not in st.session_state:
+    # Bounded in-memory tail; every entry is also appended to a per-session log,
+    # deleted with the session (stale ones left by a crash are pruned here)
+    log_dir = os.environ.get('DIABETES_HISTORY_DIR', DEFAULT_LOG_DIR)
+    prune_logs(log_dir)
+    st.session_state.conversation_history = ConversationHistory(
+        os.path.join(log_dir, f"{st.session_state.session_id}.jsonl"), temporary=True)
+if 'user_info' not in st.session_state:
+    st.session_state.user_info = {}
+if 'jobs' not in st.session_state:
+    # Job slot -> key of the background job this session is waiting on
+    st.session_state.jobs = {}
+if 'section_timings' not in st.session_state:
+    st.session_state.section_timings = {}
+if 'alert_engine' not in st.session_state:
+    # Alerts raised for this user's readings, newest last; callbacks can also
+    # forward them elsewhere (pager, EHR inbox)
+    st.session_state.recent_alerts = deque(maxlen=10)
+    st.session_state.alert_engine = AlertEngine()
+    st.session_state.alert_engine.subscribe(st.session_state.recent_alerts.append)
+if 'daily_summary' not in st.session_state:
+    # Roll "today" over at midnight in the browser's timezone where Streamlit exposes it
+    context = getattr(st, 'context', None)
+    st.session_state.daily_summary = DailySummary(getattr(context, 'timezone', None) or 'UTC')
+if 'show_glucose_log' not in st.session_state:
+    st.session_state.show_glucose_log = False
+
+@st.cache_resource
+def get_knowledge_snapshot():
+    """Topic files as first read, with the stamps the watcher resumes from"""
+    return load_snapshot()
+
+@st.cache_resource
+def get_answerer():
+    """Shared answering engine over the knowledge base and guideline passages
+
+    Its knowledge base is replaced whenever the topic files change; always
+    reach the current one through get_answerer().knowledge_base.
+    """
+    with timed('knowledge base'):
+        topics, _, _ = get_knowledge_snapshot()
+        knowledge_base = KnowledgeBase(topics)
+    with timed('passage index'):
+        passage_index = load_passage_index()
+    cache_size = int(os.environ.get('DIABETES_ANSWER_CACHE_SIZE', DEFAULT_CACHE_SIZE))
+    return Answerer(knowledge_base, passage_index, AnswerCache(cache_size))
+
+@st.cache_resource
+def get_knowledge_watcher():
+    """Hot-reload edited topic files into the shared answerer"""
+    interval = float(os.environ.get('DIABETES_KNOWLEDGE_POLL', DEFAULT_POLL_SECONDS))
+    # Picks up from the files the knowledge base was built from, so edits
+    # made before the first Q&A render are not missed
+    _, stamps, errors = get_knowledge_snapshot()
+    return KnowledgeWatcher(get_answerer(), interval=interval, stamps=stamps, errors=errors).start()
+
+@st.cache_resource
+def start_metrics_exporter():
+    """Start the Prometheus exporter once per process when metrics are enabled"""
+    return metrics.start_exporter()
+
+@st.cache_resource
+def get_job_runner():
+    """Background job pool shared by all sessions"""
+    return JobRunner()
+
+def run_job(slot, key, fn, *args, retry=False):
+    """Run fn in the background for one of this session's job slots
+
+    A slot holds one job at a time: submitting a new key releases the job it
+    replaces, which is cancelled unless another session still wants it. A
+    failed job stays in its slot, so its error is shown rather than the job
+    restarting on every poll, until the key changes or ``retry`` is set.
+    """
+    runner = get_job_runner()
+    jobs = st.session_state.jobs
+    st.session_state.job_slots_used.add(slot)
+    job = runner.get(key) if jobs.get(slot) == key else None
+    if job is None or job.cancelled or (retry and job.failed()):
+        if slot in jobs:
+            runner.release(jobs[slot])
+        jobs[slot] = key
+        job = runner.submit(key, fn, *args, retry=retry)
+    return job
+
+def show_job_progress(job, text):
+    """Show a running job's progress and poll; returns False if the user cancelled"""
+    st.progress(job.fraction, text=f"{text}... {job.done_count}/{job.total}")
+    if st.button("✖️ Cancel"):
+        for slot, key in list(st.session_state.jobs.items()):
+            if key == job.key:
+                get_job_runner().release(st.session_state.jobs.pop(slot))
+        return False
+    time.sleep(0.3)
+    st.rerun()
+
+def release_unused_jobs():
+    """Release jobs whose section was not rendered in this rerun"""
+    for slot in list(st.session_state.jobs):
+        if slot not in st.session_state.job_slots_used:
+            get_job_runner().release(st.session_state.jobs.pop(slot))
+
+@st.cache_resource(max_entries=1)
+def _load_reference_data(path, stamp):
+    with timed('reference data'):
+        return load_reference_data(path)
+
+def get_reference_data():
+    """Reference data shared by all sessions; reloaded only when the file changes"""
+    return _load_reference_data(REFERENCE_DATA_PATH, file_stamp(REFERENCE_DATA_PATH))
+
+def get_glucose_buffer():
+    """This session's glucose buffer, created the first time a section needs it"""
+    if 'glucose_buffer' not in st.session_state:
+        with timed('glucose buffer'):
+            from downsampling import DownsampleCache
+            from glucose import GlucoseBuffer
+            # Fixed memory budget per user, whatever the amount of data imported
+            st.session_state.glucose_levels = DownsampleCache()
+            st.session_state.glucose_buffer = GlucoseBuffer()
+    return st.session_state.glucose_buffer
+
+def show_startup_profile():
+    """Show the cold-start timings recorded by the profiling module"""
+    with st.sidebar.expander("⏱️ Startup Profile"):
+        st.code('\n'.join(profiling.report()) or "Nothing recorded yet", language=None)
+
+def main():
+    # Sidebar for user information
+    with st.sidebar:
+        st.header("👤 User Profile")
+        st.session_state.user_info['type'] = st.selectbox(
+            "I am a:",
+            USER_TYPES
+        )
+        st.session_state.user_info['experience'] = st.selectbox(
+            "Diabetes Experience:",
+            EXPERIENCE_LEVELS
+        )
+        
+        st.markdown("---")
+        st.header("📋 Navigation")
+        # Simple navigation using markdown
+        st.markdown("""
+        **Main Sections:**
+        - 🏠 Dashboard
+        - 📊 Health Overview  
+        - 💬 Clinical Q&A
+        - 📚 Resources
+        - 📤 Export
+        """)
+        
+        st.markdown("---")
+        st.header("🔔 Glucose Alerts")
+        engine = st.session_state.alert_engine
+        with st.expander("⚙️ Alert Thresholds"):
+            engine.thresholds['low'] = st.number_input(
+                "Low (mg/dL)", 40, 100, DEFAULT_THRESHOLDS['low'])
+            engine.thresholds['high'] = st.number_input(
+                "High (mg/dL)", 150, 400, DEFAULT_THRESHOLDS['high'])
+            engine.thresholds['predict_minutes'] = st.number_input(
+                "Predict low within (minutes)", 5, 60, DEFAULT_THRESHOLDS['predict_minutes'])
+        if st.session_state.recent_alerts:
+            for alert in reversed(st.session_state.recent_alerts):
+                raised_at = datetime.fromtimestamp(alert.timestamp).strftime('%m-%d %H:%M')
+                st.warning(f"{raised_at} · {alert.message}")
+        else:
+            st.caption("No alerts from your readings")
+        
+        st.markdown("---")
+        st.header("🆘 Emergency Info")
+        st.error("""
+        **Low Blood Sugar Emergency:**
+        - Symptoms: Shaking, sweating, confusion
+        - Action: 15g fast carbs + recheck in 15min
+        
+        **Call your doctor or 911 for emergencies**
+        """)
+
+    # Main content
+    st.title("🩺 Diabetes Management Assistant")
+    st.markdown("### *Evidence-Based Clinical Decision Support System*")
+    
+    # Section selector; unlike st.tabs, only the visible section runs on a rerun
+    sections = {
+        "🏠 Dashboard": show_dashboard,
+        "📊 Health Overview": show_health_overview,
+        "💬 Clinical Q&A": show_qa_system,
+        "📚 Resources": show_resources,
+        "📤 Export": show_export
+    }
+    if st.session_state.user_info['type'] == "Healthcare Professional":
+        sections["🏥 Clinic Panel"] = show_clinic_panel
+    section = st.radio("Section", list(sections), key='section', horizontal=True,
+                       label_visibility="collapsed")
+    
+    start = time.perf_counter()
+    st.session_state.job_slots_used = set()
+    with span(SECTION_SECONDS, section=sections[section].__name__):
+        sections[section]()
+    release_unused_jobs()
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    st.session_state.section_timings[section] = elapsed_ms
+    st.caption(f"⏱️ {section} rendered in {elapsed_ms:.1f} ms")
+
+def show_dashboard():
+    """Show main dashboard with overview"""
+    st.header("🏠 Diabetes Management Dashboard")
+    
+    # Key metrics row
+    st.subheader("🎯 Key Clinical Metrics")
+    targets = get_reference_data().metrics['clinical_targets']
+    metric_cols = st.columns(len(targets))
+    
+    for i, (label, value, delta) in enumerate(targets):
+        with metric_cols[i]:
+            st.metric(label, value, delta)
+    
+    # Management pillars
+    st.subheader("🎯 Management Pillars")
+    pillars = st.columns(5)
+    
+    pillar_data = [
+        ("💊", "Medication", "Take as prescribed"),
+        ("🥗", "Nutrition", "Balanced diet"),
+        ("🏃", "Exercise", "150 mins/week"),
+        ("📊", "Monitoring", "Regular checks"),
+        ("🎓", "Education", "Continuous learning")
+    ]
+    
+    for i, (icon, title, desc) in enumerate(pillar_data):
+        with pillars[i]:
+            st.markdown(f"""
+            <div style='text-align: center; padding: 15px; background: #e8f4f8; border-radius: 10px; margin: 5px;'>
+                <h2>{icon}</h2>
+                <strong>{title}</strong><br>
+                <small>{desc}</small>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    # Quick actions
+    st.subheader("🚀 Quick Actions")
+    action_cols = st.columns(4)
+    
+    actions = [
+        ("📝", "Log Blood Sugar", "Record glucose reading"),
+        ("💊", "Medication Info", "Learn about treatments"),
+        ("🥗", "Meal Planning", "Diet recommendations"),
+        ("📈", "View Trends", "See progress over time")
+    ]
+    
+    for i, (icon, title, desc) in enumerate(actions):
+        with action_cols[i]:
+            if st.button(f"{icon} {title}", use_container_width=True, help=desc):
+                if title == "Log Blood Sugar":
+                    st.session_state.show_glucose_log = not st.session_state.show_glucose_log
+                else:
+                    st.info(f"**{title}** feature would open here. This is a demonstration.")
+    
+    if st.session_state.show_glucose_log:
+        show_glucose_log()
+    
+    # Recent activity
+    st.subheader("📋 Today's Summary")
+    summary_cols = st.columns(3)
+    
+    # Running aggregates; nothing here scans the day's readings
+    today = st.session_state.daily_summary.today(int(time.time()))
+    glucose, medication = today['glucose'], today['medication']
+    activity, meal = today['activity'], today['meal']
+    
+    with summary_cols[0]:
+        st.markdown("**Glucose Checks**")
+        st.write(f"✅ {glucose.count} completed today")
+        if glucose.count:
+            st.write(f"🕒 Last: {glucose.last:.0f} mg/dL")
+            st.write(f"📊 Mean {glucose.mean:.0f} · Range {glucose.min:.0f}-{glucose.max:.0f} mg/dL")
+    
+    with summary_cols[1]:
+        st.markdown("**Medications**")
+        st.write(f"✅ {medication.count} dose{'' if medication.count == 1 else 's'} logged today")
+        if medication.last_label:
+            st.write(f"💊 {medication.last_label}")
+    
+    with summary_cols[2]:
+        st.markdown("**Activity**")
+        st.write(f"🏃 {activity.total:.0f} mins active")
+        st.write(f"🥗 Meals logged: {meal.count}")
+
+def show_glucose_log():
+    """Record a single reading or import a meter/CGM export"""
+    from glucose import ingest
+    buffer = get_glucose_buffer()
+    
+    daily_summary = st.session_state.daily_summary
+    
+    log_col, event_col, import_col = st.columns(3)
+    
+    with log_col:
+        with st.form("glucose_log", clear_on_submit=True):
+            reading = st.number_input("Blood glucose (mg/dL)", min_value=20, max_value=600, value=120)
+            if st.form_submit_button("💾 Save Reading"):
+                now = int(time.time())
+                buffer.append(now, reading)
+                daily_summary.add('glucose', now, reading)
+                st.success(f"Saved {reading} mg/dL")
+                for alert in st.session_state.alert_engine.process('me', now, reading):
+                    st.toast(alert.message)
+    
+    with event_col:
+        with st.form("event_log", clear_on_submit=True):
+            kind = st.selectbox("Event", ["Medication", "Activity", "Meal"])
+            detail = st.text_input("Details", placeholder="e.g. Metformin 500mg, walking")
+            minutes = st.number_input("Minutes (activity only)", min_value=0, max_value=600, value=30)
+            if st.form_submit_button("💾 Save Event"):
+                value = float(minutes) if kind == "Activity" else 1.0
+                daily_summary.add(kind.lower(), int(time.time()), value, detail or None)
+                st.success(f"Saved {kind.lower()} event")
+    
+    with import_col:
+        upload = st.file_uploader("Import meter or CGM export", type=['csv', 'json', 'jsonl'])
+        if upload is not None and st.button("📥 Import Readings"):
+            alerts = []
+            try:
+                added = ingest(buffer, upload, upload.name,
+                               on_chunk=lambda ts, mgdl: import_chunk(ts, mgdl, alerts))
+            except ValueError as e:
+                st.error(f"Could not import {upload.name}: {e}")
+            else:
+                st.session_state.glucose_levels.precompute(buffer)
+                st.success(f"Imported {added} readings from {upload.name}")
+                if alerts:
+                    st.toast(f"{len(alerts)} glucose alerts raised by the imported readings")
+
+def import_chunk(timestamps, mgdl, alerts):
+    """Feed one imported chunk to the daily summary and the alert engine"""
+    st.session_state.daily_summary.add_many('glucose', timestamps, mgdl)
+    alerts.extend(st.session_state.alert_engine.process_many(
+        ['me'] * len(timestamps), timestamps.tolist(), mgdl.tolist()))
+
+def show_health_overview():
+    """Show health metrics and diagrams"""
+    from downsampling import WINDOWS_DAYS
+    from glucose import chart_frame
+    st.header("📊 Diabetes Health Overview")
+    
+    # Shared, cached reference tables; nothing is rebuilt per rerun
+    reference = get_reference_data()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("🩸 Blood Glucose Ranges")
+        
+        # Display as a table with color coding
+        st.dataframe(reference.tables['glucose_ranges'], use_container_width=True)
+        
+        buffer = get_glucose_buffer()
+        if len(buffer):
+            st.subheader("📈 Glucose Monitoring")
+            days = st.radio("Window", WINDOWS_DAYS, key='glucose_window', horizontal=True,
+                            format_func=lambda d: f"{d} day" if d == 1 else f"{d} days")
+            # Min/max per bucket keeps hypo/hyper excursions at every zoom level
+            timestamps, values = st.session_state.glucose_levels.get(buffer, days)
+            st.line_chart(chart_frame(timestamps, values), x='Time', y='Glucose')
+            st.caption(f"{len(values)} of {len(buffer)} readings plotted · {buffer.nbytes // 1024} KB buffer")
+        else:
+            st.subheader("📈 Sample Glucose Monitoring")
+            # Sample glucose data throughout day until real readings are logged
+            st.line_chart(reference.tables['sample_glucose'], x='Time', y='Glucose')
+    
+    with col2:
+        st.subheader("🔬 Diabetes Statistics")
+        st.dataframe(reference.tables['diabetes_stats'], use_container_width=True)
+        
+        st.subheader("🎯 HbA1c Targets by Group")
+        st.dataframe(reference.tables['hba1c_targets'], use_container_width=True)
+        
+        # Visual indicators
+        st.subheader("📊 Risk Indicators")
+        risks = reference.metrics['risk_indicators']
+        risk_cols = st.columns(len(risks))
+        for i, (label, value, delta) in enumerate(risks):
+            with risk_cols[i]:
+                st.metric(label, value, delta)
+    
+    if len(buffer):
+        show_glycemic_analytics(buffer, st.session_state.glucose_window)
+
+def show_glycemic_analytics(buffer, days):
+    """Show time in range, GMI, CV and the AGP for the selected window"""
+    from analytics import agp_frame, ambulatory_glucose_profile, glycemic_summary
+    from downsampling import time_window
+    st.subheader(f"🧮 Glycemic Analytics - Last {days} Day{'s' if days > 1 else ''}")
+    
+    # Recomputed only when new readings arrive or the window changes
+    key = (buffer.version, days)
+    cached = st.session_state.get('glucose_analytics')
+    if cached is None or cached[0] != key:
+        timestamps, values = time_window(*buffer.arrays(), days * 86400)
+        # Time of day in the browser's timezone, like the daily summary
+        timezone = st.session_state.daily_summary.timezone
+        cached = (key, glycemic_summary(timestamps, values),
+                  agp_frame(*ambulatory_glucose_profile(timestamps, values, timezone)))
+        st.session_state.glucose_analytics = cached
+    _, summary, agp = cached
+    
+    metric_cols = st.columns(5)
+    with metric_cols[0]:
+        st.metric("Time in Range", f"{summary['time_in_range']:.0%}", "Goal >70%")
+    with metric_cols[1]:
+        st.metric("Time Below Range", f"{summary['time_below_range']:.0%}", "Goal <4%")
+    with metric_cols[2]:
+        st.metric("Time Above Range", f"{summary['time_above_range']:.0%}", "Goal <25%")
+    with metric_cols[3]:
+        st.metric("GMI (est. HbA1c)", f"{summary['gmi']:.1f}%", f"Mean {summary['mean']:.0f} mg/dL")
+    with metric_cols[4]:
+        st.metric("Variability (CV)", f"{summary['cv']:.0f}%", "Goal ≤36%")
+    
+    st.markdown("**Ambulatory Glucose Profile** (percentiles by time of day)")
+    st.line_chart(agp)
+
+def show_qa_system():
+    """Show the question-answering system"""
+    st.header("💬 Clinical Question & Answer System")
+    st.markdown("### *Get evidence-based answers to your diabetes questions*")
+    
+    # User context
+    user_type = st.session_state.user_info.get('type', 'Patient')
+    experience = st.session_state.user_info.get('experience', 'Newly Diagnosed')
+    
+    st.info(f"👤 **Session for**: {user_type} | **Experience**: {experience}")
+    
+    # Quick question buttons
+    st.subheader("🚀 Common Questions")
+    
+    col1, col2 = st.columns(2)
+    
+    common_questions = {
+        "Blood Sugar": "What are the target blood sugar ranges for diabetes?",
+        "Medication": "What is the first-line medication for type 2 diabetes?",
+        "Diet": "What foods should I eat with diabetes?",
+        "Exercise": "How much exercise is recommended for diabetes management?",
+        "Symptoms": "What are the common symptoms of diabetes?",
+        "Monitoring": "How often should I check my blood sugar?"
+    }
+    
+    with col1:
+        for i, (title, question) in enumerate(list(common_questions.items())[:3]):
+            if st.button(f"🎯 {title}", key=f"quick_{i}", use_container_width=True):
+                process_question(question, user_type, experience)
+    
+    with col2:
+        for i, (title, question) in enumerate(list(common_questions.items())[3:]):
+            if st.button(f"🎯 {title}", key=f"quick_{i+3}", use_container_width=True):
+                process_question(question, user_type, experience)
+    
+    cache_stats = get_answerer().cache.stats()
+    st.caption(f"⚡ Answer cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+               f"{cache_stats['evictions']} evictions ({cache_stats['hit_rate']:.0%} hit rate)")
+    show_knowledge_status(user_type)
+    
+    # Custom question input
+    st.subheader("💭 Ask Your Own Question")
+    custom_question = st.text_area(
+        "Type your diabetes-related question:",
+        placeholder="Examples:\n• What are the symptoms of low blood sugar?\n• How can I prevent diabetes complications?\n• What's the difference between type 1 and type 2?",
+        height=100
+    )
+    
+    if st.button("🎯 Get Clinical Answer", type="primary", use_container_width=True):
+        if custom_question.strip():
+            process_question(custom_question, user_type, experience)
+        else:
+            st.warning("Please enter a question first.")
+    
+    # Conversation history
+    if st.session_state.conversation_history:
+        st.subheader("📖 Conversation History")
+        show_history_page(st.session_state.conversation_history)
+
+def show_knowledge_status(user_type):
+    """Show the knowledge base version, the last reload and any content errors"""
+    watcher = get_knowledge_watcher()
+    knowledge_base = get_answerer().knowledge_base
+    status = f"📚 Knowledge base {knowledge_base.version} · {len(knowledge_base.topics)} topics"
+    reload = watcher.last_reload
+    if reload:
+        updated = len(reload['changed']) + len(reload['removed'])
+        status += (f" · reloaded {updated} topic{'' if updated == 1 else 's'} in "
+                   f"{reload['seconds'] * 1000:.1f} ms at {datetime.fromtimestamp(reload['time']):%H:%M:%S}")
+    st.caption(status)
+    # Content authors need to know an edit was rejected; patients do not
+    if user_type == "Healthcare Professional":
+        for error in watcher.errors.values():
+            st.warning(f"Serving the previous version of a topic: {error}")
+
+def show_history_page(history):
+    """Show one page of past questions, newest first, optionally filtered by a search"""
+    query = st.text_input("🔍 Search past questions", key='history_query',
+                          placeholder="e.g. insulin dosing")
+    positions = history.search(query) if query.strip() else None
+    total = len(history) if positions is None else len(positions)
+    if not total:
+        st.info(f"No past questions mention \"{query}\".")
+        return
+    
+    pages = -(-total // HISTORY_PAGE_SIZE)
+    if st.session_state.get('history_page', 1) > pages:
+        st.session_state.history_page = pages
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, key='history_page')
+    start = (page - 1) * HISTORY_PAGE_SIZE
+    
+    # Only this page's records are read and rendered
+    if positions is None:
+        stop = len(history) - start
+        records = history.page(stop - HISTORY_PAGE_SIZE, stop)[::-1]
+    else:
+        records = history.records(positions[start:start + HISTORY_PAGE_SIZE])
+    st.caption(f"Showing {start + 1}-{start + len(records)} of {total} questions")
+    if history.lost:
+        st.caption(f"{history.lost} older question{'' if history.lost == 1 else 's'} "
+                   "could not be read back from the session log.")
+    
+    for conversation in records:
+        answer_data = get_answerer().replay(conversation)
+        with st.expander(f"💬 {conversation.question[:50]}..."):
+            st.markdown(f"**🗣️ Question:** {conversation.question}")
+            st.markdown(f"**🤖 Answer:** {answer_data['answer']}")
+            st.markdown(f"*📅 Asked on: {datetime.fromtimestamp(conversation.timestamp).strftime('%Y-%m-%d %H:%M')}*")
+            
+            if answer_data['sources']:
+                with st.expander("📚 Clinical Sources"):
+                    for source in answer_data['sources']:
+                        st.write(f"• {source}")
+
+def process_question(question, user_type, experience):
+    """Process and answer diabetes questions"""
+    # A lookup of the answer pre-rendered for this audience; nothing is assembled here
+    answer_data = get_answerer().answer(question, user_type, experience)
+    
+    # Store in conversation history
+    st.session_state.conversation_history.append(question, user_type, answer_data['topic_id'],
+                                                 experience=experience,
+                                                 passages=answer_data.get('passages'))
+    
+    # Display the answer
+    with span(ANSWER_STAGE_SECONDS, stage='render'):
+        st.success("✅ **Clinical Answer Generated**")
+        st.markdown(answer_data['answer'])
+        
+        # Other topics the question also touched on, in ranked order
+        topics = get_answerer().knowledge_base.topics
+        related = [topics[topic_id]['title'] for topic_id, _ in answer_data['matches'][1:] if topic_id in topics]
+        if related:
+            st.caption(f"🔗 Related topics: {', '.join(related)}")
+        
+        # Show sources in expander
+        with st.expander("📚 **Evidence Sources & References**"):
+            st.write("**Clinical Guidelines & Research:**")
+            for source in answer_data['sources']:
+                st.write(f"• {source}")
+            st.markdown("*Based on current evidence-based medicine principles*")
+
+def show_clinic_panel():
+    """Show population risk metrics for a clinic's patient panel"""
+    import pandas as pd
+    from clinic import list_panels, panel_fingerprint, panel_path
+    st.header("🏥 Clinic Panel Analytics")
+    st.markdown("### *Per-patient glycemic risk across your panel*")
+    
+    # Only panels under the configured root can be opened; the metrics cache
+    # is written into the panel directory
+    clinic_root = os.environ.get('DIABETES_CLINIC_DIR')
+    if not clinic_root or not os.path.isdir(clinic_root):
+        st.info("Clinic panels are not configured. Set DIABETES_CLINIC_DIR to the clinic's panel directory.")
+        return
+    panels = list_panels(clinic_root)
+    if not panels:
+        st.info("No patient panels found in the clinic directory.")
+        return
+    name = st.selectbox("Panel (one .npz partition per patient)", panels,
+                        format_func=lambda name: "All patients" if name == '.' else name)
+    try:
+        panel_dir = panel_path(clinic_root, name)
+    except ValueError as e:
+        st.error(str(e))
+        return
+    
+    # Refresh also retries a refresh that failed
+    retry = st.button("🔄 Refresh Panel", type="primary")
+    if retry:
+        st.session_state.clinic_paused = False
+    if st.session_state.get('clinic_paused'):
+        st.info("Panel refresh cancelled. Press Refresh Panel to resume.")
+        return
+    
+    # Keyed on every partition's stamp, so an unchanged panel reuses the finished
+    # job (from any session) and a changed one recomputes only what changed
+    key = ('clinic', panel_dir, panel_fingerprint(panel_dir))
+    job = run_job('clinic', key, refresh_panel_job, panel_dir, retry=retry)
+    if not job.done():
+        if not show_job_progress(job, "Summarizing changed patients"):
+            st.session_state.clinic_paused = True
+            st.info("Panel refresh cancelled. Press Refresh Panel to resume.")
+        return
+    if job.failed():
+        st.error(f"Could not refresh the panel: {job.future.exception()}")
+        return
+    rows, stats = job.result()
+    
+    st.caption(f"{stats['patients']} patients · {stats['recomputed']} recomputed in {stats['seconds']:.2f}s")
+    if stats['errors']:
+        st.warning(f"{len(stats['errors'])} patient partition(s) could not be read and are left out")
+        with st.expander("Unreadable partitions"):
+            for patient_id, error in sorted(stats['errors'].items()):
+                st.write(f"• {patient_id}: {error}")
+    if stats['cache_error']:
+        st.warning(f"Could not save the panel metrics cache, so the next refresh recomputes them: {stats['cache_error']}")
+    if not rows:
+        return
+    
+    # Sorted worst time-below-range first; click a column header to re-sort
+    panel = pd.DataFrame({
+        'Patient': [row['patient_id'] for row in rows],
+        'Below Range %': [100 * row.get('time_below_range', 0.0) for row in rows],
+        'In Range %': [100 * row.get('time_in_range', 0.0) for row in rows],
+        'Above Range %': [100 * row.get('time_above_range', 0.0) for row in rows],
+        'GMI %': [row.get('gmi') for row in rows],
+        'CV %': [row.get('cv') for row in rows],
+        'Readings': [row['readings'] for row in rows],
+        'Last Reading': pd.to_datetime([row.get('last_reading') for row in rows], unit='s')
+    })
+    numeric = panel.select_dtypes('number').columns
+    panel[numeric] = panel[numeric].round(1)
+    st.dataframe(panel, use_container_width=True, hide_index=True)
+
+def refresh_panel_job(job, panel_dir):
+    from clinic import refresh_panel
+    return refresh_panel(panel_dir, progress=job.report)
+
+def show_export():
+    """Export readings, daily analytics or Q&A history as CSV or Parquet"""
+    import export
+    st.header("📤 Export Your Data")
+    st.markdown("### *Download your records for your care team or your own analysis*")
+    
+    dataset = st.selectbox("Data", ["Glucose readings", "Daily glycemic analytics", "Q&A history"])
+    fmt = st.radio("Format", export.FORMATS, horizontal=True, format_func=str.upper)
+    today = date.today()
+    days = st.date_input("Date range (UTC)", value=(today - timedelta(days=90), today))
+    if len(days) != 2:
+        st.info("Pick the last day of the range.")
+        return
+    start, end = export.day_bounds(*days)
+    
+    # One prepared file per session, kept on disk until the selection changes
+    # (or the temp directory is cleaned under it)
+    params = (dataset, fmt, start, end)
+    prepared = st.session_state.get('export_file')
+    if prepared and (prepared.key != params or not prepared.exists()):
+        prepared.discard()
+        prepared = st.session_state.export_file = None
+    
+    if st.button("📦 Prepare Export", type="primary"):
+        if dataset == "Q&A history":
+            chunks = export.history_chunks(st.session_state.conversation_history, start, end)
+            schema = export.HISTORY_SCHEMA
+        elif dataset == "Glucose readings":
+            chunks = export.reading_chunks(*get_glucose_buffer().arrays(), start, end)
+            schema = export.READINGS_SCHEMA
+        else:
+            chunks = export.daily_summary_chunks(*get_glucose_buffer().arrays(), start, end)
+            schema = export.DAILY_SCHEMA
+        # Written to disk chunk by chunk
+        ready = export.PreparedExport(chunks, schema, fmt, key=params)
+        if prepared:
+            prepared.discard()
+        prepared = st.session_state.export_file = ready
+    
+    if prepared:
+        slug = dataset.lower().replace(' ', '_').replace('q&a', 'qa')
+        # Read from disk only when clicked, not on every rerun
+        st.download_button(f"💾 Download {prepared.rows} rows", prepared.read, type="primary",
+                           file_name=f"{slug}_{days[0]}_{days[1]}.{fmt}",
+                           mime='text/csv' if fmt == 'csv' else 'application/octet-stream')
+        st.caption("Timestamps are UTC epoch seconds.")
+
+def show_resources():
+    """Show educational resources"""
+    st.header("📚 Diabetes Educational Resources")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        st.subheader("🏥 Clinical Guidelines")
+        st.markdown("""
+        **American Diabetes Association (ADA):**
+        - Standards of Medical Care in Diabetes
+        - Nutrition Therapy Recommendations
+        - Technology Standards
+        
+        **International Guidelines:**
+        - WHO Diabetes Guidelines
+        - NICE Guidelines (UK)
+        - IDF Global Diabetes Plan
+        
+        **Specialty Organizations:**
+        - AACE Comprehensive Guidelines
+        - Endocrine Society Guidelines
+        - ADA/EASD Consensus Reports
+        """)
+        
+        st.subheader("🔬 Research Databases")
+        st.markdown("""
+        **Medical Literature:**
+        - PubMed/MEDLINE
+        - Cochrane Library
+        - ClinicalTrials.gov
+        
+        **Professional Journals:**
+        - Diabetes Care
+        - The Lancet Diabetes & Endocrinology
+        - Diabetologia
+        - JAMA Diabetes Specialties
+        """)
+    
+    with col2:
+        st.subheader("📱 Patient Tools & Apps")
+        st.markdown("""
+        **Monitoring Tools:**
+        - Blood Glucose Logs
+        - Carbohydrate Counting Guides
+        - Meal Planning Templates
+        - Exercise Trackers
+        
+        **Mobile Applications:**
+        - Glucose Monitoring Apps
+        - Medication Reminders
+        - Nutrition Databases
+        - Physical Activity Guides
+        
+        **Educational Platforms:**
+        - Diabetes Self-Management Education
+        - Online Support Communities
+        - Video Learning Libraries
+        """)
+        
+        st.subheader("🎓 Professional Development")
+        st.markdown("""
+        **Continuing Education:**
+        - ADA Professional Membership
+        - Clinical Conference Updates
+        - Certification Programs
+        - Research Opportunities
+        
+        **Teaching Resources:**
+        - Patient Education Materials
+        - Clinical Decision Tools
+        - Guideline Implementation
+        - Quality Improvement
+        """)
+    
+    # Emergency section
+    st.markdown("---")
+    st.error("""
+    🚨 **MEDICAL EMERGENCY PROTOCOL**
+    
+    **For Hypoglycemia (Low Blood Sugar) Emergency:**
+    1. Check blood glucose if possible
+    2. If <70 mg/dL with symptoms: Give 15g fast-acting carbohydrate
+    3. Recheck in 15 minutes, repeat if still low
+    4. If unconscious or unable to swallow: CALL 911 IMMEDIATELY
+    5. Administer glucagon if prescribed
+    
+    **For Hyperglycemia (High Blood Sugar) Emergency:**
+    1. Check blood glucose and ketones if possible
+    2. If glucose >240 mg/dL with symptoms: Contact healthcare provider
+    3. If symptoms severe (vomiting, confusion): SEEK EMERGENCY CARE
+    4. Follow sick day management protocol
+    
+    **ALWAYS SEEK PROFESSIONAL MEDICAL HELP FOR EMERGENCIES**
+    """)
+
+# Run the application
+if __name__ == "__main__":
+    if metrics.ENABLED:
+        start_metrics_exporter()
+        ACTIVE_SESSIONS.touch(st.session_state.session_id)
+    with span(SECTION_SECONDS, section='main'):
+        main()
+    if profiling.ENABLED:
+        if profiling.first_paint():
+            print("Startup profile:", *profiling.report(), sep='\n', file=sys.stderr)
+        show_startup_profile()
@@ -0,0 +1,64 @@
+# downsampling.py
+import numpy as np
+
+# Roughly the width of the Health Overview chart column
+DEFAULT_CHART_WIDTH_PX = 700
+
+WINDOWS_DAYS = (1, 14, 90)
+
+
+def time_window(timestamps, values, seconds):
+    """Views of the readings in the last ``seconds`` before the newest one"""
+    if not len(timestamps):
+        return timestamps, values
+    start = np.searchsorted(timestamps, timestamps[-1] - seconds, side='left')
+    return timestamps[start:], values[start:]
+
+
+def minmax_downsample(timestamps, values, max_points):
+    """Reduce a series to at most ``max_points`` by keeping each bucket's min and max
+
+    Readings are split into equal-count buckets and the lowest and highest
+    reading of every bucket are kept in time order, so hypo- and
+    hyperglycemic excursions survive at any zoom level.
+    """
+    count = len(values)
+    if count <= max_points:
+        return timestamps, values
+    buckets = max(max_points // 2, 1)
+    size = -(-count // buckets)
+    buckets = -(-count // size)
+
+    padded = np.full(buckets * size, np.nan, dtype=np.float64)
+    padded[:count] = values
+    padded = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    lows = offsets + np.nanargmin(padded, axis=1)
+    highs = offsets + np.nanargmax(padded, axis=1)
+
+    keep = np.unique(np.concatenate([lows, highs]))  # sorted, so still in time order
+    return timestamps[keep], values[keep]
+
+
+class DownsampleCache:
+    """Per-session cache of downsampled windows, keyed on the buffer's version"""
+
+    def __init__(self):
+        self._version = None
+        self._levels = {}
+
+    def get(self, buffer, days, width_px=DEFAULT_CHART_WIDTH_PX):
+        """Downsampled (timestamps, mg/dL) for the last ``days`` of a GlucoseBuffer"""
+        if buffer.version != self._version:
+            self._levels.clear()
+            self._version = buffer.version
+        key = (days, width_px)
+        if key not in self._levels:
+            timestamps, values = time_window(*buffer.arrays(), days * 86400)
+            self._levels[key] = minmax_downsample(timestamps, values, width_px)
+        return self._levels[key]
+
+    def precompute(self, buffer, windows=WINDOWS_DAYS, width_px=DEFAULT_CHART_WIDTH_PX):
+        """Fill every zoom level up front so switching windows is a lookup"""
+        for days in windows:
+            self.get(buffer, days, width_px)
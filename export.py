@@ -0,0 +1,206 @@
+# export.py
+"""Streaming export of glucose readings, daily analytics and Q&A history
+
+    python export.py /data/panel -o panel.parquet --start 2024-01-01 --end 2024-12-31
+
+Every export is a generator of column chunks written one at a time to CSV
+or Parquet (one row group per chunk), so writing it needs memory for one
+chunk and, for a panel, the largest single patient partition, whatever
+the size of the export. Timestamps are UTC epoch seconds stored as int64,
+and the date-range filter is applied to each chunk before it is serialized.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import weakref
+from datetime import date, datetime, time, timedelta, timezone
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from analytics import glycemic_summary
+from clinic import scan_partitions
+
+DEFAULT_CHUNKSIZE = 50_000
+
+FORMATS = ('csv', 'parquet')
+
+READINGS_SCHEMA = pa.schema([('timestamp', pa.int64()), ('mgdl', pa.float32())])
+PANEL_READINGS_SCHEMA = pa.schema([('patient_id', pa.string()), ('timestamp', pa.int64()),
+                                   ('mgdl', pa.float32())])
+DAILY_SCHEMA = pa.schema([
+    ('day', pa.int64()),  # UTC midnight, epoch seconds
+    ('readings', pa.int64()),
+    ('mean', pa.float64()),
+    ('gmi', pa.float64()),
+    ('cv', pa.float64()),
+    ('time_below_range', pa.float64()),
+    ('time_in_range', pa.float64()),
+    ('time_above_range', pa.float64())
+])
+HISTORY_SCHEMA = pa.schema([('timestamp', pa.int64()), ('user_type', pa.string()),
+                            ('experience', pa.string()), ('topic_id', pa.string()),
+                            ('question', pa.string())])
+
+
+def day_bounds(first_day=None, last_day=None):
+    """Epoch seconds [start, end) covering whole UTC days; None leaves a side open"""
+    def midnight(day):
+        return int(datetime.combine(day, time(), timezone.utc).timestamp())
+    start = midnight(first_day) if first_day is not None else None
+    end = midnight(last_day + timedelta(days=1)) if last_day is not None else None
+    return start, end
+
+
+def _in_range(timestamps, start, end):
+    mask = np.ones(len(timestamps), dtype=bool)
+    if start is not None:
+        mask &= timestamps >= start
+    if end is not None:
+        mask &= timestamps < end
+    return mask
+
+
+def reading_chunks(timestamps, mgdl, start=None, end=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Column chunks of one patient's readings inside [start, end)"""
+    for i in range(0, len(timestamps), chunksize):
+        chunk_times = np.asarray(timestamps[i:i + chunksize], dtype=np.int64)
+        mask = _in_range(chunk_times, start, end)
+        if mask.any():
+            yield {'timestamp': chunk_times[mask],
+                   'mgdl': np.asarray(mgdl[i:i + chunksize], dtype=np.float32)[mask]}
+
+
+def panel_reading_chunks(directory, start=None, end=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Column chunks of every patient's readings in a panel, one partition at a time"""
+    for patient_id, (path, _) in sorted(scan_partitions(directory).items()):
+        with np.load(path) as data:
+            timestamps, mgdl = data['timestamps'], data['mgdl']
+        for chunk in reading_chunks(timestamps, mgdl, start, end, chunksize):
+            chunk['patient_id'] = np.full(len(chunk['timestamp']), patient_id, dtype=object)
+            yield chunk
+
+
+def daily_summary_chunks(timestamps, mgdl, start=None, end=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Column chunks of per-UTC-day glycemic metrics for time-ordered readings"""
+    rows = {name: [] for name in DAILY_SCHEMA.names}
+    # Days are cut from the (time-ordered) arrays one at a time
+    days = np.asarray(timestamps, dtype=np.int64) // 86400
+    bounds = np.concatenate(([0], np.flatnonzero(np.diff(days)) + 1, [len(days)]))
+    for first, last in zip(bounds[:-1], bounds[1:]):
+        day_times = np.asarray(timestamps[first:last], dtype=np.int64)
+        mask = _in_range(day_times, start, end)
+        if not mask.any():
+            continue
+        summary = glycemic_summary(day_times[mask], np.asarray(mgdl[first:last])[mask])
+        rows['day'].append(int(days[first]) * 86400)
+        for name in DAILY_SCHEMA.names[1:]:
+            rows[name].append(summary[name])
+        if len(rows['day']) >= chunksize:
+            yield rows
+            rows = {name: [] for name in DAILY_SCHEMA.names}
+    if rows['day']:
+        yield rows
+
+
+def history_chunks(history, start=None, end=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Column chunks of a ConversationHistory, paged in from its log"""
+    for i in range(0, len(history), chunksize):
+        records = [record for record in history.page(i, i + chunksize)
+                   if (start is None or record.timestamp >= start)
+                   and (end is None or record.timestamp < end)]
+        if records:
+            yield {'timestamp': [record.timestamp for record in records],
+                   'user_type': [record.user_type for record in records],
+                   'experience': [record.experience for record in records],
+                   'topic_id': [record.topic_id for record in records],
+                   'question': [record.question for record in records]}
+
+
+def write_export(chunks, schema, destination, fmt='parquet'):
+    """Write column chunks to a path or binary file object; returns rows written
+
+    Each chunk is converted to the schema's column types on its own, so
+    nothing holds more than one chunk in memory.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt} (expected one of {', '.join(FORMATS)})")
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(destination, schema)
+    else:
+        writer = pa_csv.CSVWriter(destination, schema)
+    rows = 0
+    with writer:
+        for chunk in chunks:
+            batch = pa.record_batch([pa.array(chunk[field.name], type=field.type) for field in schema],
+                                    schema=schema)
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+class PreparedExport:
+    """An export written to a temporary file for download
+
+    read() loads it back in full, e.g. only once a download is clicked. The
+    file is deleted by discard() or, failing that, when the object is
+    garbage collected (e.g. with the session that prepared it) or the
+    process exits. A failed write leaves no file behind.
+    """
+
+    def __init__(self, chunks, schema, fmt='parquet', key=None):
+        f = tempfile.NamedTemporaryFile(suffix=f'.{fmt}', delete=False)
+        try:
+            with f:
+                self.rows = write_export(chunks, schema, f, fmt)
+        except BaseException:
+            _remove_file(f.name)
+            raise
+        self.path = f.name
+        self.key = key
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+
+    def read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def discard(self):
+        self._finalizer()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export a clinic panel's glucose readings")
+    parser.add_argument('panel_dir', help="directory of <patient_id>.npz partitions")
+    parser.add_argument('-o', '--output', required=True, help="output .csv or .parquet file")
+    parser.add_argument('--start', type=date.fromisoformat, help="first day to include (UTC)")
+    parser.add_argument('--end', type=date.fromisoformat, help="last day to include (UTC)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    fmt = os.path.splitext(args.output)[1].lstrip('.').lower()
+    if fmt not in FORMATS:
+        parser.error("output must end in .csv or .parquet")
+    start, end = day_bounds(args.start, args.end)
+    temporary = args.output + '.tmp'
+    rows = write_export(panel_reading_chunks(args.panel_dir, start, end, args.chunksize),
+                        PANEL_READINGS_SCHEMA, temporary, fmt)
+    os.replace(temporary, args.output)
+    print(f"Exported {rows} readings to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
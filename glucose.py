@@ -0,0 +1,213 @@
+# glucose.py
+import os
+
+import numpy as np
+import pandas as pd
+
+MGDL_PER_MMOL = 18.0182
+
+# 90 days of 5-minute CGM readings
+DEFAULT_CAPACITY = 90 * 288
+
+DEFAULT_CHUNKSIZE = 50_000
+
+EPOCH = pd.Timestamp(0, tz='UTC')
+
+TIMESTAMP_COLUMNS = ('timestamp', 'device timestamp', 'datetime', 'date', 'time', 'dateString')
+MGDL_COLUMNS = ('glucose', 'mg/dl', 'glucose value (mg/dl)', 'historic glucose mg/dl',
+                'sgv', 'value')
+MMOL_COLUMNS = ('mmol/l', 'glucose value (mmol/l)', 'historic glucose mmol/l')
+
+
+class GlucoseBuffer:
+    """Fixed-capacity columnar ring buffer of (epoch seconds, mg/dL) readings
+
+    Every reading is written twice, ``capacity`` slots apart, so the live
+    window is always one contiguous slice: appends are O(1) and readers get
+    NumPy views instead of copies of the history. Memory use is fixed at
+    ``2 * capacity * 12`` bytes whatever the amount ingested; the oldest
+    readings are overwritten once the buffer is full.
+
+    Readings are kept in time order with one reading per timestamp, since
+    readers slice windows by time. Readings newer than the last one are
+    appended in place; older ones (a backfilled export, say) are merged in,
+    which rewrites the window, and timestamps already buffered are skipped,
+    so importing the same file twice adds nothing.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._values = np.zeros(2 * capacity, dtype=np.float32)
+        self._next = 0  # slot in [0, capacity) for the next reading
+        self._size = 0
+        self.version = 0  # bumped on every write, for caches keyed on content
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return self._timestamps.nbytes + self._values.nbytes
+
+    def append(self, timestamp, mgdl):
+        """Add one reading, in O(1) when it is newer than the last one"""
+        last = self.last
+        if last is not None and timestamp <= last[0]:
+            self.extend([timestamp], [mgdl])
+            return
+        i = self._next
+        self._timestamps[i] = self._timestamps[i + self.capacity] = timestamp
+        self._values[i] = self._values[i + self.capacity] = mgdl
+        self._next = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self.version += 1
+
+    def extend(self, timestamps, mgdl):
+        """Add a chunk of readings; returns the (timestamps, mg/dL) actually added
+
+        A chunk that starts after the last reading costs time proportional
+        to the chunk only; anything older is merged into the window.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        mgdl = np.asarray(mgdl, dtype=np.float32)
+        if not len(timestamps):
+            return timestamps, mgdl
+        order = np.argsort(timestamps, kind='stable')
+        timestamps, mgdl = timestamps[order], mgdl[order]
+        first = np.concatenate(([True], np.diff(timestamps) != 0))
+        timestamps, mgdl = timestamps[first], mgdl[first]
+
+        last = self.last
+        if last is None or timestamps[0] > last[0]:
+            timestamps, mgdl = timestamps[-self.capacity:], mgdl[-self.capacity:]
+            self._write(timestamps, mgdl)
+            return timestamps, mgdl
+        return self._merge(timestamps, mgdl)
+
+    def _merge(self, timestamps, mgdl):
+        """Merge sorted, distinct readings that overlap the window in time order"""
+        buffered_times, buffered_values = self.arrays()
+        positions = np.searchsorted(buffered_times, timestamps)
+        found = np.minimum(positions, len(buffered_times) - 1)
+        new = buffered_times[found] != timestamps
+        timestamps, mgdl = timestamps[new], mgdl[new]
+        if not len(timestamps):
+            return timestamps, mgdl
+
+        merged_times = np.concatenate((buffered_times, timestamps))
+        merged_values = np.concatenate((buffered_values, mgdl))
+        order = np.argsort(merged_times, kind='stable')[-self.capacity:]
+        # Readings older than everything kept in a full buffer are not added
+        kept = timestamps >= merged_times[order[0]]
+        self._next = self._size = 0
+        self._write(merged_times[order], merged_values[order])
+        return timestamps[kept], mgdl[kept]
+
+    def _write(self, timestamps, mgdl):
+        count = len(timestamps)
+        slots = (self._next + np.arange(count)) % self.capacity
+        self._timestamps[slots] = self._timestamps[slots + self.capacity] = timestamps
+        self._values[slots] = self._values[slots + self.capacity] = mgdl
+        self._next = (self._next + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        self.version += 1
+
+    def arrays(self):
+        """Read-only (timestamps, mg/dL) views over the buffered readings, oldest first"""
+        end = self._next if self._next >= self._size else self._next + self.capacity
+        start = end - self._size
+        timestamps = self._timestamps[start:end]
+        values = self._values[start:end]
+        timestamps.flags.writeable = values.flags.writeable = False
+        return timestamps, values
+
+    @property
+    def last(self):
+        """Most recent (timestamp, mg/dL), or None"""
+        if not self._size:
+            return None
+        i = self._next - 1 if self._next else self.capacity - 1
+        return int(self._timestamps[i]), float(self._values[i])
+
+
+def _find_column(columns, candidates):
+    lowered = {str(column).strip().lower(): column for column in columns}
+    for candidate in candidates:
+        if candidate.lower() in lowered:
+            return lowered[candidate.lower()]
+    return None
+
+
+def _chunk_arrays(frame):
+    """Extract sorted (epoch seconds, mg/dL) arrays from one parsed chunk"""
+    time_column = _find_column(frame.columns, TIMESTAMP_COLUMNS)
+    if time_column is None:
+        raise ValueError(f"No timestamp column in export (columns: {list(frame.columns)})")
+    value_column = _find_column(frame.columns, MGDL_COLUMNS)
+    scale = 1.0
+    if value_column is None:
+        value_column = _find_column(frame.columns, MMOL_COLUMNS)
+        scale = MGDL_PER_MMOL
+    if value_column is None:
+        raise ValueError(f"No glucose column in export (columns: {list(frame.columns)})")
+
+    raw_times = frame[time_column]
+    if pd.api.types.is_numeric_dtype(raw_times):
+        # Nightscout-style epoch milliseconds
+        times = pd.to_datetime(raw_times, unit='ms', utc=True, errors='coerce')
+    else:
+        times = pd.to_datetime(raw_times, utc=True, errors='coerce', format='mixed')
+    values = pd.to_numeric(frame[value_column], errors='coerce') * scale
+    valid = times.notna() & values.notna()
+    seconds = ((times[valid] - EPOCH) // pd.Timedelta(seconds=1)).to_numpy(dtype=np.int64)
+    values = values[valid].to_numpy(dtype=np.float32)
+    order = np.argsort(seconds, kind='stable')
+    return seconds[order], values[order]
+
+
+def read_readings(source, name=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield (epoch seconds, mg/dL) array chunks from a meter or CGM export
+
+    ``source`` is a path or file object holding CSV, JSON lines or a JSON
+    array; ``name`` gives the file name when ``source`` is a file object.
+    CSV and JSON lines are parsed ``chunksize`` rows at a time. Each chunk is
+    sorted by time; chunks may overlap each other or the buffered readings.
+    """
+    name = (name or (source if isinstance(source, str) else getattr(source, 'name', ''))).lower()
+    extension = os.path.splitext(name)[1]
+    if extension == '.csv':
+        chunks = pd.read_csv(source, chunksize=chunksize)
+    elif extension in ('.jsonl', '.ndjson'):
+        chunks = pd.read_json(source, lines=True, chunksize=chunksize)
+    elif extension == '.json':
+        chunks = [pd.read_json(source)]
+    else:
+        raise ValueError(f"Unsupported glucose export format: {name or 'unknown'}")
+    for frame in chunks:
+        seconds, values = _chunk_arrays(frame)
+        if len(seconds):
+            yield seconds, values
+
+
+def ingest(buffer, source, name=None, chunksize=DEFAULT_CHUNKSIZE, on_chunk=None):
+    """Stream an export into a buffer chunk by chunk; returns readings added
+
+    ``on_chunk(timestamps, mgdl)`` is called with the readings each chunk
+    actually added, e.g. to update running aggregates without rereading the
+    buffer, so readings that were already buffered are not counted twice.
+    """
+    added = 0
+    for seconds, values in read_readings(source, name, chunksize):
+        seconds, values = buffer.extend(seconds, values)
+        if not len(seconds):
+            continue
+        if on_chunk is not None:
+            on_chunk(seconds, values)
+        added += len(seconds)
+    return added
+
+
+def chart_frame(timestamps, mgdl):
+    """DataFrame with 'Time' and 'Glucose' columns for st.line_chart"""
+    return pd.DataFrame({'Time': pd.to_datetime(timestamps, unit='s'), 'Glucose': mgdl})
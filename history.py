@@ -0,0 +1,236 @@
+# history.py
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import weakref
+from array import array
+from collections import deque
+
+from audience import DEFAULT_EXPERIENCE
+
+DEFAULT_TAIL_SIZE = 20
+DEFAULT_LOG_DIR = os.path.join(tempfile.gettempdir(), 'diabetes_history')
+
+# Logs untouched for this many seconds are left over from ended sessions
+DEFAULT_LOG_MAX_AGE = 24 * 3600
+
+# Logs of histories still alive in this process, however long they sit idle
+_open_logs = set()
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def search_terms(text):
+    """Distinct lowercase words of a question or search query"""
+    return set(WORD.findall(text.lower()))
+
+
+def _remove_log(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _close_log(path, temporary):
+    _open_logs.discard(path)
+    if temporary:
+        _remove_log(path)
+
+
+def prune_logs(directory=DEFAULT_LOG_DIR, max_age=DEFAULT_LOG_MAX_AGE):
+    """Delete session logs not written to for ``max_age`` seconds; returns how many
+
+    Logs of histories open in this process are kept, since an idle session
+    may still page back through them.
+    """
+    cutoff = time.time() - max_age
+    removed = 0
+    try:
+        entries = list(os.scandir(directory))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            stale = (entry.name.endswith('.jsonl') and os.path.abspath(entry.path) not in _open_logs
+                     and entry.stat().st_mtime < cutoff)
+        except OSError:
+            continue
+        if stale:
+            _remove_log(entry.path)
+            removed += 1
+    return removed
+
+
+class HistoryRecord:
+    """One asked question; the answer is referenced by topic or passage ids, not copied"""
+    __slots__ = ('timestamp', 'user_type', 'topic_id', 'question', 'experience', 'passages')
+
+    def __init__(self, timestamp, user_type, topic_id, question, experience=DEFAULT_EXPERIENCE,
+                 passages=None):
+        self.timestamp = timestamp  # epoch seconds
+        self.user_type = sys.intern(user_type)
+        self.topic_id = topic_id if topic_id is None else sys.intern(topic_id)
+        self.question = question
+        self.experience = sys.intern(experience)
+        self.passages = tuple(passages) if passages else None
+
+    def to_json(self):
+        return json.dumps([self.timestamp, self.user_type, self.topic_id, self.question,
+                           self.experience, self.passages], ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, line):
+        return cls(*json.loads(line))
+
+
+class ConversationHistory:
+    """Bounded in-memory tail of a session's questions over an append-only log
+
+    Every record is appended to a JSONL log as it is added; only the newest
+    ``tail_size`` stay in memory. Older records are paged back in from the
+    log through an index of byte offsets. An inverted index from question
+    words to record positions is extended on every append, so search()
+    never rescans the log. A ``temporary`` log is deleted once the history
+    is garbage collected, e.g. when the session holding it ends.
+
+    If the log is deleted or cut short from outside, the records paged out
+    to it are lost: the history starts a new log from its in-memory tail
+    and counts the rest in ``lost``.
+    """
+
+    def __init__(self, path, tail_size=DEFAULT_TAIL_SIZE, temporary=False):
+        self.path = os.path.abspath(path)
+        self.lost = 0
+        self._tail = deque(maxlen=tail_size)
+        self._offsets = array('q')
+        self._postings = {}  # word -> array of record positions, ascending
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        open(self.path, 'ab').close()
+        self._end = os.path.getsize(self.path)
+        _open_logs.add(self.path)
+        weakref.finalize(self, _close_log, self.path, temporary)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __bool__(self):
+        return bool(self._offsets)
+
+    def append(self, question, user_type, topic_id, timestamp=None, experience=DEFAULT_EXPERIENCE,
+               passages=None):
+        record = HistoryRecord(int(time.time() if timestamp is None else timestamp),
+                               user_type, topic_id, question, experience, passages)
+        try:
+            intact = os.path.getsize(self.path) >= self._end
+        except OSError:
+            intact = False
+        if not intact:
+            self._restart()
+        self._write([record])
+        return record
+
+    def _write(self, records):
+        lines = [(record.to_json() + '\n').encode('utf-8') for record in records]
+        with open(self.path, 'ab') as f:
+            f.write(b''.join(lines))
+        for record, line in zip(records, lines):
+            position = len(self._offsets)
+            self._offsets.append(self._end)
+            self._end += len(line)
+            self._tail.append(record)
+            for term in search_terms(record.question):
+                postings = self._postings.get(term)
+                if postings is None:
+                    postings = self._postings[term] = array('q')
+                postings.append(position)
+
+    def _restart(self):
+        """Start a new log holding only the in-memory tail; returns how many records were lost"""
+        kept = list(self._tail)
+        dropped = len(self) - len(kept)
+        self.lost += dropped
+        self._tail.clear()
+        self._offsets = array('q')
+        self._postings = {}
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        open(self.path, 'wb').close()
+        self._end = 0
+        self._write(kept)
+        return dropped
+
+    def __getitem__(self, index):
+        """Record by position, oldest first; negative indexes count from the newest"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        tail_start = len(self) - len(self._tail)
+        if index >= tail_start:
+            return self._tail[index - tail_start]
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self._offsets[index])
+                return HistoryRecord.from_json(f.readline().decode('utf-8'))
+        except (OSError, ValueError, TypeError):
+            self._restart()
+            raise IndexError(index) from None
+
+    def page(self, start, stop):
+        """Records at positions [start, stop), oldest first, reading the log once"""
+        start, stop = max(start, 0), min(stop, len(self))
+        if start >= stop:
+            return []
+        tail_start = len(self) - len(self._tail)
+        records = []
+        if start < tail_start:
+            try:
+                with open(self.path, 'rb') as f:
+                    f.seek(self._offsets[start])
+                    for _ in range(min(stop, tail_start) - start):
+                        records.append(HistoryRecord.from_json(f.readline().decode('utf-8')))
+            except (OSError, ValueError, TypeError):
+                dropped = self._restart()
+                return self.page(start - dropped, stop - dropped)
+        records.extend(self._tail[i - tail_start] for i in range(max(start, tail_start), stop))
+        return records
+
+    def recent(self, count):
+        """Newest ``count`` records, newest first"""
+        return self.page(len(self) - count, len(self))[::-1]
+
+    def records(self, positions):
+        """Records at arbitrary positions, in the order given, reading the log once"""
+        tail_start = len(self) - len(self._tail)
+        found = {}
+        on_disk = sorted(p for p in set(positions) if p < tail_start)
+        if on_disk:
+            try:
+                with open(self.path, 'rb') as f:
+                    for position in on_disk:
+                        f.seek(self._offsets[position])
+                        found[position] = HistoryRecord.from_json(f.readline().decode('utf-8'))
+            except (OSError, ValueError, TypeError):
+                # Positions of the records still held move down by the number lost
+                dropped = self._restart()
+                return self.records([p - dropped for p in positions if p >= dropped])
+        return [found[p] if p < tail_start else self._tail[p - tail_start] for p in positions]
+
+    def search(self, query):
+        """Positions of records whose question contains every word of query, newest first"""
+        terms = search_terms(query)
+        if not terms:
+            return []
+        postings = sorted((self._postings.get(term, ()) for term in terms), key=len)
+        if not postings[0]:
+            return []
+        # Intersect starting from the rarest word, so common words cost nothing extra
+        matches = set(postings[0])
+        for other in postings[1:]:
+            matches.intersection_update(other)
+            if not matches:
+                return []
+        return sorted(matches, reverse=True)
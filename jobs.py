@@ -0,0 +1,122 @@
+# jobs.py
+"""Background jobs for work too slow to run inside a Streamlit script run
+
+A job is submitted under a key. Submitting the same key again, from any
+session, returns the running or finished job instead of starting a new
+one; a failed job stays failed, so its error can be shown, until it is
+resubmitted with ``retry=True``. Job functions receive the Job as their first argument and call
+``job.report(done, total)``, which both publishes progress and raises
+JobCancelled once the job has been cancelled.
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+
+# Finished jobs kept for reuse
+DEFAULT_RETAINED = 64
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        self.done_count = 0
+        self.total = 0
+        self.started = time.time()
+        self.finished = None
+        self.subscribers = 0
+        self._cancel = threading.Event()
+
+    def report(self, done, total):
+        """Publish progress; raises JobCancelled if the job was cancelled"""
+        self.done_count, self.total = done, total
+        if self._cancel.is_set():
+            raise JobCancelled(self.key)
+
+    def cancel(self):
+        self._cancel.set()
+        self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    @property
+    def fraction(self):
+        return self.done_count / self.total if self.total else 0.0
+
+    def done(self):
+        return self.future.done()
+
+    def failed(self):
+        return self.future.done() and (self.cancelled or self.future.exception() is not None)
+
+    def result(self):
+        return self.future.result()
+
+
+class JobRunner:
+    """Thread pool of keyed, reusable, cancellable jobs shared by all sessions"""
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, retained=DEFAULT_RETAINED):
+        self.retained = retained
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='diabetes-job')
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, retry=False, **kwargs):
+        """Start ``fn(job, *args, **kwargs)`` under key, or return the job already there
+
+        Cancelled jobs are replaced; a job that raised is only replaced when
+        ``retry`` is set. The caller becomes a subscriber and should
+        release() the job when it loses interest.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or job.cancelled or (retry and job.failed()):
+                job = Job(key)
+                job.future = self._executor.submit(self._run, job, fn, args, kwargs)
+                self._jobs[key] = job
+            self._jobs.move_to_end(key)
+            job.subscribers += 1
+            self._trim()
+            return job
+
+    def _run(self, job, fn, args, kwargs):
+        try:
+            return fn(job, *args, **kwargs)
+        finally:
+            job.finished = time.time()
+
+    def _trim(self):
+        finished = [key for key, job in self._jobs.items() if job.done()]
+        for key in finished[:max(0, len(finished) - self.retained)]:
+            del self._jobs[key]
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def release(self, key):
+        """Drop one subscriber; an unfinished job nobody wants any more is cancelled"""
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                return
+            job.subscribers = max(0, job.subscribers - 1)
+            if not job.subscribers and not job.done():
+                job.cancel()
+
+    def cancel(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.done():
+                job.cancel()
+
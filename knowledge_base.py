@@ -0,0 +1,364 @@
+# knowledge_base.py
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+from audience import DEFAULT_EXPERIENCE, render, render_variants
+
+# Clinical Q&A content, one JSON file per topic named after its 'id'.
+# 'keywords' are the primary terms for a topic and weigh more than 'synonyms'
+# when ranking; plurals are generated automatically. 'order' breaks ranking
+# ties, 'variants' optionally replaces the answer for a user type before it
+# is rendered for each audience, 'simplified' is the plain-language text
+# shown to patients and caregivers new to diabetes and 'professional' the
+# dense text shown to healthcare professionals (see audience.py).
+KNOWLEDGE_DIR = os.environ.get(
+    'DIABETES_KNOWLEDGE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'knowledge'))
+
+TOPIC_SUFFIX = '.json'
+REQUIRED_FIELDS = ('id', 'title', 'keywords', 'answer', 'sources')
+TEXT_FIELDS = ('id', 'title', 'answer')
+LIST_FIELDS = ('keywords', 'synonyms', 'sources')
+AUDIENCE_FIELDS = ('simplified', 'professional')
+
+# Seconds between checks of the content directory for edited topic files
+DEFAULT_POLL_SECONDS = 2.0
+
+
+def load_topic(path):
+    """Parse and validate one topic file; raises ValueError if it is malformed"""
+    with open(path, encoding='utf-8') as f:
+        try:
+            topic = json.load(f)
+        except ValueError as e:
+            raise ValueError(f"{path}: {e}") from None
+    if not isinstance(topic, dict):
+        raise ValueError(f"{path}: expected a JSON object")
+    missing = [field for field in REQUIRED_FIELDS if not topic.get(field)]
+    if missing:
+        raise ValueError(f"{path}: missing {', '.join(missing)}")
+    topic.setdefault('synonyms', [])
+    topic.setdefault('variants', {})
+    for field in TEXT_FIELDS:
+        if not isinstance(topic[field], str):
+            raise ValueError(f"{path}: '{field}' must be a string")
+    # A bare string would be split into letters and a blank term matches everything
+    for field in LIST_FIELDS:
+        if not (isinstance(topic[field], list)
+                and all(isinstance(item, str) and item.strip() for item in topic[field])):
+            raise ValueError(f"{path}: '{field}' must be a list of non-empty strings")
+    if topic['id'] != _topic_id(path):
+        raise ValueError(f"{path}: id {topic['id']!r} does not match the file name")
+    order = topic.get('order', 0)
+    if isinstance(order, bool) or not isinstance(order, (int, float)):
+        raise ValueError(f"{path}: 'order' must be a number")
+    if not (isinstance(topic['variants'], dict)
+            and all(isinstance(answer, str) for answer in topic['variants'].values())):
+        raise ValueError(f"{path}: 'variants' must map user types to answers")
+    for field in AUDIENCE_FIELDS:
+        if not isinstance(topic.get(field, ''), str):
+            raise ValueError(f"{path}: '{field}' must be a string")
+    return topic
+
+
+def _topic_id(path):
+    return os.path.basename(path)[:-len(TOPIC_SUFFIX)]
+
+
+def scan_topic_files(directory=KNOWLEDGE_DIR):
+    """Map path -> change stamp for every topic file in a content directory"""
+    stamps = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(TOPIC_SUFFIX) and entry.is_file():
+                stat = entry.stat()
+                stamps[entry.path] = (stat.st_mtime_ns, stat.st_size)
+    return stamps
+
+
+def _rank(topic):
+    return (topic.get('order', float('inf')), topic['id'])
+
+
+def load_topics(directory=KNOWLEDGE_DIR, errors=None, paths=None):
+    """Every well-formed topic in a content directory, in ranking order
+
+    A file that fails to parse is skipped, and recorded in ``errors`` (path
+    -> message) when given, so one bad file cannot keep the app from
+    starting. ``paths`` restricts loading to those files.
+    """
+    topics = []
+    for path in scan_topic_files(directory) if paths is None else paths:
+        try:
+            topics.append(load_topic(path))
+        except (OSError, ValueError) as e:
+            if errors is not None:
+                errors[path] = str(e)
+    return sorted(topics, key=_rank)
+
+
+def load_snapshot(directory=KNOWLEDGE_DIR):
+    """(topics, stamps, errors) for a KnowledgeBase and the watcher that keeps it current
+
+    The files are stamped before they are read, so a KnowledgeWatcher
+    started from these stamps reloads anything edited since.
+    """
+    stamps = scan_topic_files(directory)
+    errors = {}
+    return load_topics(directory, errors, stamps), stamps, errors
+
+
+TOPIC_ERRORS = {}
+TOPICS = load_topics(errors=TOPIC_ERRORS)
+
+FALLBACK_ANSWER = """
+**💡 Diabetes Management Guidance**
+
+Based on your question about *"{question}"*, here are key principles:
+
+**General Diabetes Management:**
+- **Individualized Care**: Treatment plans should be personalized
+- **Regular Monitoring**: Track blood glucose, blood pressure, weight
+- **Lifestyle Foundation**: Nutrition and exercise are cornerstone therapies
+- **Medication Adherence**: Take prescribed medications consistently
+- **Preventive Care**: Regular eye, foot, dental exams
+
+**Next Steps:**
+- Discuss specific concerns with your healthcare provider
+- Consider diabetes education programs
+- Join support groups for shared experiences
+
+*For more specific information, try asking about: blood sugar targets, medications, diet, exercise, or symptoms.*
+"""
+
+FALLBACK_SOURCES = ["General Diabetes Education", "Clinical Practice Guidelines"]
+
+# Rendered per audience once; only the question is filled in per request
+FALLBACK_VARIANTS = render_variants(FALLBACK_ANSWER)
+
+KEYWORD_WEIGHT = 2
+SYNONYM_WEIGHT = 1
+
+
+def _surface_forms(term):
+    """Return a term together with its plural spellings"""
+    head, _, last = term.rpartition(' ')
+    forms = {last, last + 's', last + 'es'}
+    if last.endswith('y'):
+        forms.add(last[:-1] + 'ies')
+    return {f"{head} {form}" if head else form for form in forms}
+
+
+def _trie_pattern(node):
+    """Turn a character trie into a regex with no ambiguous alternatives"""
+    terminal = '' in node
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    if len(branches) == 1 and not terminal:
+        return branches[0]
+    group = '(?:' + '|'.join(branches) + ')'
+    # Greedy optional suffix so the longest term wins, e.g. "low blood sugar"
+    # over "low"
+    return group + '?' if terminal else group
+
+
+def compile_matcher(terms):
+    """Compile terms into a single word-bounded trie regex"""
+    if not terms:
+        return re.compile(r'(?!)')  # never matches, e.g. every topic file was removed
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[''] = True
+    return re.compile(r'\b' + _trie_pattern(trie) + r'\b')
+
+
+class KnowledgeBase:
+    """Clinical Q&A topics with a precompiled multi-keyword matcher
+
+    Instances are not modified after construction. updated() returns a new
+    instance that reuses the index entries of unchanged topics, so readers
+    holding the old one keep a consistent view while it is swapped out.
+    """
+
+    def __init__(self, topics):
+        self.topics = {}
+        self._topic_terms = {}  # topic_id -> [(surface form, weight)]
+        self._rendered = {}     # topic_id -> {(user_type, experience): answer}
+        self._hashes = {}
+        for topic in topics:
+            self._index_topic(topic)
+        self._build()
+
+    def _index_topic(self, topic):
+        weighted = [(term, KEYWORD_WEIGHT) for term in topic['keywords']]
+        weighted += [(term, SYNONYM_WEIGHT) for term in topic.get('synonyms', [])]
+        self.topics[topic['id']] = topic
+        self._topic_terms[topic['id']] = [(form, weight) for term, weight in weighted
+                                          for form in _surface_forms(term.lower())]
+        self._rendered[topic['id']] = render_variants(topic['answer'], topic.get('variants'),
+                                                        topic.get('simplified'),
+                                                        topic.get('professional'))
+        self._hashes[topic['id']] = hashlib.sha1(
+            json.dumps(topic, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _build(self):
+        """Merge the per-topic index entries into the shared matcher"""
+        self._order = {topic_id: _rank(topic) for topic_id, topic in self.topics.items()}
+        # Content hash; anything derived from the topics is stale when it changes
+        self.version = hashlib.sha1(
+            json.dumps(sorted(self._hashes.items())).encode('utf-8')).hexdigest()[:12]
+
+        # Surface form -> list of (topic_id, weight)
+        self._terms = {}
+        for topic_id, forms in self._topic_terms.items():
+            for form, weight in forms:
+                self._terms.setdefault(form, []).append((topic_id, weight))
+        self._matcher = compile_matcher(self._terms)
+
+    def updated(self, changed=(), removed=()):
+        """New KnowledgeBase with topics added or replaced and topic ids removed
+
+        Only the changed topics are reindexed; the rest are shared with this
+        instance.
+        """
+        new = KnowledgeBase.__new__(KnowledgeBase)
+        new.topics = {k: v for k, v in self.topics.items() if k not in removed}
+        new._topic_terms = {k: v for k, v in self._topic_terms.items() if k not in removed}
+        new._rendered = {k: v for k, v in self._rendered.items() if k not in removed}
+        new._hashes = {k: v for k, v in self._hashes.items() if k not in removed}
+        for topic in changed:
+            new._index_topic(topic)
+        new._build()
+        return new
+
+    def match(self, question):
+        """Return every matching (topic_id, score), best first"""
+        seen = set()
+        scores = {}
+        for found in self._matcher.finditer(question.lower()):
+            form = found.group()
+            if form in seen:
+                continue
+            seen.add(form)
+            for topic_id, weight in self._terms[form]:
+                scores[topic_id] = scores.get(topic_id, 0) + weight
+        return sorted(scores.items(), key=lambda item: (-item[1], self._order[item[0]]))
+
+    def topic_answer(self, topic_id, matches=(), user_type=None, experience=DEFAULT_EXPERIENCE):
+        """Return a fresh answer dict for a topic, rendered for the audience"""
+        topic = self.topics[topic_id]
+        answer = self._rendered[topic_id].get((user_type, experience))
+        if answer is None:
+            # An audience outside the precomputed set
+            answer = render(topic.get('variants', {}).get(user_type, topic['answer']),
+                            user_type, experience, topic.get('simplified'),
+                            topic.get('professional'))
+        return {
+            'topic_id': topic_id,
+            'answer': answer,
+            'sources': list(topic['sources']),
+            'matches': list(matches),
+            'fallback': False
+        }
+
+    def answer(self, question, user_type=None, experience=DEFAULT_EXPERIENCE):
+        """Return a fresh answer dict for the best matching topic, rendered for the audience"""
+        matches = self.match(question)
+        if matches:
+            return self.topic_answer(matches[0][0], matches, user_type, experience)
+        template = FALLBACK_VARIANTS.get((user_type, experience))
+        if template is None:
+            template = render(FALLBACK_ANSWER, user_type, experience)
+        return {
+            'topic_id': None,
+            'answer': template.format(question=question),
+            'sources': list(FALLBACK_SOURCES),
+            'matches': [],
+            'fallback': True
+        }
+
+
+class KnowledgeWatcher:
+    """Poll a content directory and swap reindexed topics into a shared holder
+
+    ``holder`` is any object with a ``knowledge_base`` attribute, such as an
+    Answerer. Replacing that attribute is atomic, so sessions keep answering
+    from one version or the other throughout a reload. A file that fails to
+    parse is reported in ``errors`` and its topic keeps its previous version
+    until the file changes again.
+
+    ``stamps`` and ``errors`` describe the files the holder's knowledge base
+    was built from (see load_snapshot()); without them the files are taken
+    to match it as they are when the watcher is created.
+    """
+
+    def __init__(self, holder, directory=KNOWLEDGE_DIR, interval=DEFAULT_POLL_SECONDS,
+                 stamps=None, errors=None):
+        self.holder = holder
+        self.directory = directory
+        self.interval = interval
+        self.errors = dict(errors or {})  # path -> parse error
+        self.last_reload = None
+        self._stamps = scan_topic_files(directory) if stamps is None else dict(stamps)
+        self._stop = threading.Event()
+
+    def check(self):
+        """Apply the files changed since the last check; returns a reload report or None"""
+        start = time.perf_counter()
+        stamps = scan_topic_files(self.directory)
+        changed_paths = [path for path, stamp in stamps.items() if self._stamps.get(path) != stamp]
+        removed_paths = [path for path in self._stamps if path not in stamps]
+        if not changed_paths and not removed_paths:
+            return None
+        self._stamps = stamps
+
+        changed = []
+        for path in changed_paths:
+            try:
+                changed.append(load_topic(path))
+            except (OSError, ValueError) as e:
+                self.errors[path] = str(e)
+            else:
+                self.errors.pop(path, None)
+        removed = [_topic_id(path) for path in removed_paths]
+        for path in removed_paths:
+            self.errors.pop(path, None)
+
+        if changed or removed:
+            self.holder.knowledge_base = self.holder.knowledge_base.updated(changed, removed)
+        self.last_reload = {
+            'time': time.time(),
+            'seconds': time.perf_counter() - start,
+            'changed': sorted(topic['id'] for topic in changed),
+            'removed': sorted(removed),
+            'errors': sorted(_topic_id(path) for path in changed_paths if path in self.errors),
+            'version': self.holder.knowledge_base.version
+        }
+        return self.last_reload
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except OSError as e:
+                # e.g. the directory is being replaced; try again next time
+                self.errors[self.directory] = str(e)
+            else:
+                self.errors.pop(self.directory, None)
+
+    def start(self):
+        """Check for changes every ``interval`` seconds in a daemon thread"""
+        threading.Thread(target=self._run, daemon=True, name='knowledge-watcher').start()
+        return self
+
+    def stop(self):
+        self._stop.set()
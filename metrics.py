@@ -0,0 +1,205 @@
+# metrics.py
+"""Process-wide timing histograms and counters with a Prometheus text export
+
+Enabled by setting DIABETES_METRICS=1, DIABETES_METRICS_PORT (serve
+http://localhost:PORT/metrics) or DIABETES_METRICS_FILE (rewrite the file
+every DIABETES_METRICS_INTERVAL seconds). When disabled, span() returns a
+shared no-op context manager.
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = os.environ.get('DIABETES_METRICS_PORT')
+METRICS_FILE = os.environ.get('DIABETES_METRICS_FILE')
+METRICS_INTERVAL = float(os.environ.get('DIABETES_METRICS_INTERVAL', 15))
+ENABLED = bool(os.environ.get('DIABETES_METRICS') or METRICS_PORT or METRICS_FILE)
+
+# Seconds; fixed so histograms from every session and worker can be summed
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Sessions seen within this many seconds count as active
+ACTIVE_SESSION_WINDOW = 300
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{value}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [per-bucket counts + overflow, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, list(counts), total) for key, (counts, total) in self._series.items())
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                labels = _labels(self.labels + ('le',), key + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class SessionGauge:
+    """Number of distinct sessions seen in the last ACTIVE_SESSION_WINDOW seconds"""
+
+    def __init__(self, name, help):
+        self.name, self.help = name, help
+        self._last_seen = {}
+        self._lock = threading.Lock()
+
+    def touch(self, session_id):
+        with self._lock:
+            self._last_seen[session_id] = time.time()
+
+    def render(self):
+        cutoff = time.time() - ACTIVE_SESSION_WINDOW
+        with self._lock:
+            for session_id in [s for s, seen in self._last_seen.items() if seen < cutoff]:
+                del self._last_seen[session_id]
+            active = len(self._last_seen)
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge",
+                f"{self.name} {active}"]
+
+
+class _Span:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(histogram, **labels):
+    """Context manager timing its block into histogram; a no-op when metrics are off"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(histogram, labels)
+
+
+SECTION_SECONDS = Histogram(
+    'diabetes_section_render_seconds', "Time to run main() and each app section", ['section'])
+ANSWER_STAGE_SECONDS = Histogram(
+    'diabetes_answer_stage_seconds', "Time spent in each question answering stage", ['stage'])
+QUESTIONS_ANSWERED = Counter(
+    'diabetes_questions_answered_total', "Questions answered")
+FALLBACK_ANSWERS = Counter(
+    'diabetes_fallback_answers_total', "Questions answered with the generic fallback")
+ACTIVE_SESSIONS = SessionGauge(
+    'diabetes_active_sessions', f"Sessions active in the last {ACTIVE_SESSION_WINDOW} seconds")
+
+REGISTRY = (SECTION_SECONDS, ANSWER_STAGE_SECONDS, QUESTIONS_ANSWERED, FALLBACK_ANSWERS,
+            ACTIVE_SESSIONS)
+
+
+def render():
+    """All metrics in Prometheus text exposition format"""
+    return '\n'.join(line for metric in REGISTRY for line in metric.render()) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write_file(path):
+    """Atomically replace path with the current metrics"""
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        f.write(render())
+    os.replace(path + '.tmp', path)
+
+
+def _write_periodically(path, interval):
+    while True:
+        write_file(path)
+        time.sleep(interval)
+
+
+def start_exporter(port=METRICS_PORT, path=METRICS_FILE, interval=METRICS_INTERVAL):
+    """Start the configured exporters in daemon threads; call once per process"""
+    threads = []
+    if port:
+        server = ThreadingHTTPServer(('127.0.0.1', int(port)), _MetricsHandler)
+        threads.append(threading.Thread(target=server.serve_forever, daemon=True,
+                                        name='metrics-http'))
+    if path:
+        threads.append(threading.Thread(target=_write_periodically, args=(path, interval),
+                                        daemon=True, name='metrics-file'))
+    for thread in threads:
+        thread.start()
+    return threads
@@ -0,0 +1,105 @@
+# profiling.py
+"""Cold-start profile: module import times and one-off initialization steps
+
+Enabled by setting DIABETES_PROFILE_STARTUP=1. Importing this module first
+marks the start of the first script run; each step is recorded only the
+first time it runs in the process, so the report shows what a cold worker
+pays up to its first paint. Imports are timed by wrapping __import__, which
+is only installed when profiling is on.
+"""
+import builtins
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+
+ENABLED = bool(os.environ.get('DIABETES_PROFILE_STARTUP'))
+
+SCRIPT_START = time.perf_counter()
+
+# Imports faster than this are left out of the report
+MIN_IMPORT_SECONDS = 0.001
+
+# (kind, name, seconds, depth) in the order the steps finished, so like
+# python -X importtime a module's own imports are listed before it
+STEPS = []
+_recorded = set()
+_lock = threading.Lock()
+_reported = False
+
+
+def _record(kind, name, seconds, depth=0):
+    with _lock:
+        if (kind, name) not in _recorded:
+            _recorded.add((kind, name))
+            STEPS.append((kind, name, seconds, depth))
+
+
+class _Step:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        _record('init', self.name, time.perf_counter() - self.start)
+        return False
+
+
+_NULL_STEP = nullcontext()
+
+
+def timed(name):
+    """Context manager recording the first run of an initialization step"""
+    if not ENABLED or ('init', name) in _recorded:
+        return _NULL_STEP
+    return _Step(name)
+
+
+_original_import = builtins.__import__
+_import_depth = threading.local()
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # Only first imports of top-level modules; submodules count towards their package
+    if level or '.' in name or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    depth = getattr(_import_depth, 'value', 0)
+    _import_depth.value = depth + 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _import_depth.value = depth
+        seconds = time.perf_counter() - start
+        if seconds >= MIN_IMPORT_SECONDS:
+            _record('import', name, seconds, depth)
+
+
+if ENABLED:
+    builtins.__import__ = _timed_import
+
+
+def first_paint():
+    """Mark the end of the first script run; returns True only the first time"""
+    global _reported
+    with _lock:
+        if _reported:
+            return False
+        _reported = True
+    _record('init', 'first paint', time.perf_counter() - SCRIPT_START)
+    return True
+
+
+def report():
+    """Recorded steps as text lines, nested imports indented under their importer"""
+    lines = []
+    for kind, name, seconds, depth in list(STEPS):
+        label = f"import {name}" if kind == 'import' else name
+        lines.append(f"{seconds * 1000:9.1f} ms  {'  ' * depth}{label}")
+    return lines
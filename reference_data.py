@@ -0,0 +1,41 @@
+# reference_data.py
+import json
+import os
+from types import MappingProxyType
+
+REFERENCE_DATA_PATH = os.environ.get(
+    'DIABETES_REFERENCE_DATA',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'reference_data.json'))
+
+
+def file_stamp(path=REFERENCE_DATA_PATH):
+    """Cheap change marker for the data file, used as the cache key"""
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ReferenceData:
+    """Clinical reference tables and metrics; shared across sessions, treat as read-only"""
+
+    def __init__(self, version, tables, metrics):
+        self.version = version
+        self._columns = tables
+        self._tables = None
+        self.metrics = MappingProxyType({name: tuple(map(tuple, rows))
+                                         for name, rows in metrics.items()})
+
+    @property
+    def tables(self):
+        """Tables as DataFrames, built on first use so pages showing only metrics skip pandas"""
+        if self._tables is None:
+            import pandas as pd
+            self._tables = MappingProxyType({name: pd.DataFrame(columns)
+                                             for name, columns in self._columns.items()})
+        return self._tables
+
+
+def load_reference_data(path=REFERENCE_DATA_PATH):
+    """Parse the versioned reference data file into table columns and metric rows"""
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+    return ReferenceData(raw['version'], raw['tables'], raw.get('metrics', {}))
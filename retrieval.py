@@ -0,0 +1,236 @@
+# retrieval.py
+import argparse
+import json
+import os
+import re
+import time
+from collections import Counter
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*")
+
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i if in is it my of on or
+should the to what when which who why will with you your
+""".split())
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+
+def tokenize(text):
+    """Lowercase word tokens without stopwords"""
+    return [token for token in TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def read_passages(path):
+    """Yield (text, source) passages from a .jsonl or plain-text guideline dump
+
+    JSONL lines need a 'text' field and may carry a 'source'. Plain text is
+    split on blank lines and every passage is attributed to the file name.
+    """
+    default_source = os.path.splitext(os.path.basename(path))[0]
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record['text'], record.get('source', default_source)
+            return
+        for block in re.split(r'\n\s*\n', f.read()):
+            block = ' '.join(block.split())
+            if block:
+                yield block, default_source
+
+
+class PassageIndex:
+    """BM25 passage index stored as a term-major sparse matrix
+
+    Column ``t`` of the matrix holds the precomputed BM25 weight of term
+    ``t`` in every passage containing it (``doc_ids``/``weights`` sliced by
+    ``indptr``), so scoring a query is a single sparse matrix-vector product.
+    """
+
+    def __init__(self, vocab, indptr, doc_ids, weights, source_ids, sources,
+                 text_offsets, texts):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.source_ids = source_ids
+        self.sources = sources
+        self.text_offsets = text_offsets
+        self.texts = texts
+
+    def __len__(self):
+        return len(self.source_ids)
+
+    @classmethod
+    def build(cls, passages, k1=K1, b=B):
+        """Tokenize (text, source) passages and precompute BM25 weights"""
+        vocab = {}
+        sources = {}
+        term_ids, doc_ids, tfs = [], [], []
+        lengths, source_ids, blobs = [], [], []
+        for doc_id, (text, source) in enumerate(passages):
+            counts = Counter(tokenize(text))
+            for term, tf in counts.items():
+                term_ids.append(vocab.setdefault(term, len(vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+            lengths.append(sum(counts.values()))
+            source_ids.append(sources.setdefault(source, len(sources)))
+            blobs.append(text.encode('utf-8'))
+
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        doc_ids = np.asarray(doc_ids, dtype=np.int32)
+        tfs = np.asarray(tfs, dtype=np.float32)
+        lengths = np.asarray(lengths, dtype=np.float32)
+        n_docs = len(lengths)
+
+        # Sort postings by term so each term's passages are contiguous
+        order = np.argsort(term_ids, kind='stable')
+        term_ids, doc_ids, tfs = term_ids[order], doc_ids[order], tfs[order]
+        df = np.bincount(term_ids, minlength=len(vocab))
+        indptr = np.zeros(len(vocab) + 1, dtype=np.int64)
+        np.cumsum(df, out=indptr[1:])
+
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avgdl = lengths.mean() if n_docs else 1.0
+        norm = k1 * (1 - b + b * lengths[doc_ids] / avgdl)
+        weights = idf[term_ids] * tfs * (k1 + 1) / (tfs + norm)
+
+        text_offsets = np.zeros(n_docs + 1, dtype=np.int64)
+        np.cumsum([len(blob) for blob in blobs], out=text_offsets[1:])
+        texts = np.frombuffer(b''.join(blobs), dtype=np.uint8)
+
+        return cls(vocab, indptr, doc_ids, weights.astype(np.float32),
+                   np.asarray(source_ids, dtype=np.int32), list(sources),
+                   text_offsets, texts)
+
+    def save(self, directory):
+        """Write the index as flat arrays that load() can memory-map"""
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, 'indptr.npy'), self.indptr)
+        np.save(os.path.join(directory, 'doc_ids.npy'), self.doc_ids)
+        np.save(os.path.join(directory, 'weights.npy'), self.weights)
+        np.save(os.path.join(directory, 'source_ids.npy'), self.source_ids)
+        np.save(os.path.join(directory, 'text_offsets.npy'), self.text_offsets)
+        np.asarray(self.texts).tofile(os.path.join(directory, 'texts.bin'))
+        with open(os.path.join(directory, 'vocab.json'), 'w', encoding='utf-8') as f:
+            json.dump(self.vocab, f)
+        with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'passages': len(self), 'sources': self.sources}, f)
+
+    @classmethod
+    def load(cls, directory):
+        """Open a saved index; arrays are memory-mapped, not read or re-tokenized"""
+        def array(name):
+            return np.load(os.path.join(directory, name), mmap_mode='r')
+
+        with open(os.path.join(directory, 'vocab.json'), encoding='utf-8') as f:
+            vocab = json.load(f)
+        with open(os.path.join(directory, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        texts_path = os.path.join(directory, 'texts.bin')
+        if os.path.getsize(texts_path):
+            texts = np.memmap(texts_path, dtype=np.uint8, mode='r')
+        else:
+            texts = np.zeros(0, dtype=np.uint8)
+        return cls(vocab, array('indptr.npy'), array('doc_ids.npy'), array('weights.npy'),
+                   array('source_ids.npy'), meta['sources'], array('text_offsets.npy'), texts)
+
+    def scores(self, query):
+        """BM25 score of every passage for a query"""
+        columns = Counter(self.vocab[t] for t in tokenize(query) if t in self.vocab)
+        if not columns:
+            return np.zeros(len(self), dtype=np.float32)
+        ids, weights = [], []
+        for column, count in columns.items():
+            start, end = self.indptr[column], self.indptr[column + 1]
+            ids.append(self.doc_ids[start:end])
+            weights.append(self.weights[start:end] * count)
+        return np.bincount(np.concatenate(ids), weights=np.concatenate(weights),
+                           minlength=len(self))
+
+    def passage(self, doc_id):
+        """Text of one passage"""
+        start, end = self.text_offsets[doc_id], self.text_offsets[doc_id + 1]
+        return bytes(self.texts[start:end]).decode('utf-8')
+
+    def search(self, query, k=5):
+        """Top-k passages as dicts with 'doc_id', 'score', 'text' and 'source'"""
+        scores = self.scores(query)
+        k = min(k, int(np.count_nonzero(scores)))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [self._hit(doc_id, float(scores[doc_id])) for doc_id in top]
+
+    def lookup(self, doc_ids):
+        """Passages by id as search() hits without a score, e.g. to replay an answer"""
+        return [self._hit(doc_id, None) for doc_id in doc_ids if 0 <= doc_id < len(self)]
+
+    def _hit(self, doc_id, score):
+        return {
+            'doc_id': int(doc_id),
+            'score': score,
+            'text': self.passage(doc_id),
+            'source': self.sources[self.source_ids[doc_id]]
+        }
+
+
+def passages_answer(hits):
+    """Answer dict quoting retrieved guideline passages, which 'passages' lists by id"""
+    lines = ["", "**📖 Relevant Guideline Passages**", ""]
+    sources = []
+    for hit in hits:
+        lines.append(f"> {hit['text']}")
+        lines.append(f"> — *{hit['source']}*")
+        lines.append("")
+        if hit['source'] not in sources:
+            sources.append(hit['source'])
+    return {
+        'topic_id': None,
+        'answer': '\n'.join(lines),
+        'sources': sources,
+        'matches': [],
+        'passages': [hit['doc_id'] for hit in hits],
+        'fallback': False
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query a guideline passage index")
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="index .txt/.jsonl guideline dumps")
+    build.add_argument('index_dir')
+    build.add_argument('files', nargs='+')
+    search = commands.add_parser('search', help="query a saved index")
+    search.add_argument('index_dir')
+    search.add_argument('query')
+    search.add_argument('-k', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        start = time.perf_counter()
+        passages = (p for path in args.files for p in read_passages(path))
+        index = PassageIndex.build(passages)
+        index.save(args.index_dir)
+        print(f"Indexed {len(index)} passages, {len(index.vocab)} terms "
+              f"in {time.perf_counter() - start:.2f}s")
+    else:
+        index = PassageIndex.load(args.index_dir)
+        start = time.perf_counter()
+        hits = index.search(args.query, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for hit in hits:
+            print(f"{hit['score']:.3f}  [{hit['source']}]  {hit['text'][:100]}")
+        print(f"{len(hits)} hits in {elapsed:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
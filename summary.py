@@ -0,0 +1,94 @@
+# summary.py
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+EVENT_KINDS = ('glucose', 'medication', 'activity', 'meal')
+
+
+class RunningStats:
+    """Count, total, min, max and last value, updated in O(1)"""
+    __slots__ = ('count', 'total', 'min', 'max', 'last', 'last_time', 'last_label')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = self.max = self.last = None
+        self.last_time = None
+        self.last_label = None
+
+    def add(self, timestamp, value, label=None):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if self.last_time is None or timestamp >= self.last_time:
+            self.last, self.last_time = value, timestamp
+            if label is not None:
+                self.last_label = label
+
+    def add_many(self, timestamps, values):
+        """Fold a time-ordered chunk in with NumPy reductions"""
+        if not len(values):
+            return
+        self.count += len(values)
+        self.total += float(values.sum())
+        low, high = float(values.min()), float(values.max())
+        self.min = low if self.min is None else min(self.min, low)
+        self.max = high if self.max is None else max(self.max, high)
+        if self.last_time is None or timestamps[-1] >= self.last_time:
+            self.last, self.last_time = float(values[-1]), int(timestamps[-1])
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+
+class DailySummary:
+    """Today's aggregates per event kind, rolled over at midnight in the user's timezone
+
+    Each event updates the running aggregates and is then forgotten, so the
+    dashboard never rescans the day's history. Events for an earlier day
+    are ignored; an event past midnight starts a fresh day.
+    """
+
+    def __init__(self, timezone='UTC'):
+        self.timezone = ZoneInfo(timezone)
+        self.day = None
+        self._start = self._end = 0
+        self.stats = {kind: RunningStats() for kind in EVENT_KINDS}
+
+    def _roll_over(self, timestamp):
+        self.day = datetime.fromtimestamp(timestamp, self.timezone).date()
+        midnight = datetime.combine(self.day, time(), self.timezone)
+        self._start = int(midnight.timestamp())
+        # Through the date rather than +24h so DST days stay 23/25 hours long
+        self._end = int(datetime.combine(self.day + timedelta(days=1), time(),
+                                         self.timezone).timestamp())
+        self.stats = {kind: RunningStats() for kind in EVENT_KINDS}
+
+    def _accepts(self, timestamp):
+        if self.day is None or timestamp >= self._end:
+            self._roll_over(timestamp)
+        return timestamp >= self._start
+
+    def add(self, kind, timestamp, value=1.0, label=None):
+        """Record one event; returns False if it belongs to an earlier day"""
+        if not self._accepts(timestamp):
+            return False
+        self.stats[kind].add(timestamp, value, label)
+        return True
+
+    def add_many(self, kind, timestamps, values):
+        """Record a time-ordered chunk of NumPy arrays, e.g. an imported CGM export"""
+        if not len(timestamps):
+            return
+        self._accepts(int(timestamps[-1]))
+        # Chunks are NumPy arrays already, so no need to import NumPy here
+        start = timestamps.searchsorted(self._start, side='left')
+        self.stats[kind].add_many(timestamps[start:], values[start:].astype('float64', copy=False))
+
+    def today(self, now):
+        """Aggregates for the day containing ``now`` (epoch seconds)"""
+        if self.day is None or now >= self._end:
+            self._roll_over(now)
+        return self.stats
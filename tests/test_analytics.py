@@ -0,0 +1,54 @@
+# tests/test_analytics.py
+import numpy as np
+import pytest
+
+from analytics import (TIR_EDGES_MGDL, TIR_EDGES_MMOL, TIR_LABELS, classify,
+                       glycemic_summary, range_distribution)
+
+
+def label(value, units='mg/dL'):
+    ranges = glycemic_summary([0], [value], units=units)['ranges']
+    return next(name for name, fraction in ranges.items() if fraction)
+
+
+@pytest.mark.parametrize('value, expected', [
+    (53.9, 'Very Low'), (54, 'Low'), (69.9, 'Low'), (70, 'In Range'),
+    (180, 'In Range'), (180.5, 'High'), (250, 'High'), (250.5, 'Very High'),
+])
+def test_mgdl_edges(value, expected):
+    assert label(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    (2.9, 'Very Low'), (3.0, 'Low'), (3.8, 'Low'), (3.9, 'In Range'),
+    (10.0, 'In Range'), (10.1, 'High'), (13.9, 'High'), (14.0, 'Very High'),
+])
+def test_mmol_edges(value, expected):
+    assert label(value, 'mmol/L') == expected
+
+
+def test_classify_every_edge_a_lower_bound():
+    bins = classify([53, 54, 180, 181], TIR_EDGES_MGDL, upper_from=None)
+    assert bins.tolist() == [0, 1, 3, 3]
+
+
+def test_range_distribution_weighted_by_interval():
+    # Each reading lasts until the next, capped at 15 minutes; the newest
+    # lasts as long as the interval before it
+    ranges = range_distribution([100, 100, 300], [0, 300, 1200])
+    assert ranges['In Range'] == pytest.approx(1200 / 2100)
+    assert ranges['Very High'] == pytest.approx(900 / 2100)
+    assert tuple(ranges) == TIR_LABELS
+
+
+def test_summary_units_agree():
+    mgdl = np.array([90, 150, 200])
+    a = glycemic_summary([0, 300, 600], mgdl)
+    b = glycemic_summary([0, 300, 600], mgdl / 18.0182, units='mmol/L')
+    assert b['mean'] == pytest.approx(a['mean'] / 18.0182)
+    assert b['gmi'] == pytest.approx(a['gmi'])
+    assert b['ranges'] == pytest.approx(a['ranges'])
+
+
+def test_mmol_edges_match_mgdl_edges():
+    assert np.round(np.array(TIR_EDGES_MGDL) / 18.0182, 1).tolist() == list(TIR_EDGES_MMOL)
@@ -0,0 +1,23 @@
+# tests/test_audience.py
+from audience import EXPERIENCE_LEVELS, USER_TYPES, render, render_variants
+
+
+def test_render_picks_authored_text_for_audience():
+    kwargs = dict(simplified='plain', professional='dense')
+    assert render('full', 'Healthcare Professional', '1-5 Years', **kwargs).endswith('\n\ndense')
+    assert render('full', 'Student', 'Professional', **kwargs).endswith('\n\ndense')
+    assert render('full', 'Patient', 'Newly Diagnosed', **kwargs).startswith(
+        '**Patient Education - Simplified Explanation**')
+    assert render('full', 'Patient', '5+ Years', **kwargs).endswith('\n\nfull')
+    assert render('full', 'Student', 'Newly Diagnosed', **kwargs).endswith('\n\nfull')
+
+
+def test_render_falls_back_to_answer():
+    assert render('full', 'Healthcare Professional').endswith('\n\nfull')
+    assert render('full', 'Caregiver').endswith('\n\nfull')
+
+
+def test_variants_share_identical_renderings():
+    variants = render_variants('full', simplified='plain', professional='dense')
+    assert set(variants) == {(u, e) for u in USER_TYPES for e in EXPERIENCE_LEVELS}
+    assert len({id(text) for text in variants.values()}) == len(set(variants.values()))
@@ -0,0 +1,34 @@
+# tests/test_glucose.py
+from glucose import GlucoseBuffer
+
+
+def contents(buffer):
+    timestamps, values = buffer.arrays()
+    return timestamps.tolist(), values.tolist()
+
+
+def test_backfill_is_merged_in_time_order():
+    buffer = GlucoseBuffer(capacity=10)
+    buffer.extend([300, 400], [3, 4])
+    added = buffer.extend([100, 200, 350], [1, 2, 35])
+    assert added[0].tolist() == [100, 200, 350]
+    assert contents(buffer) == ([100, 200, 300, 350, 400], [1, 2, 3, 35, 4])
+
+
+def test_duplicate_timestamps_are_skipped():
+    buffer = GlucoseBuffer(capacity=10)
+    buffer.extend([100, 200], [1, 2])
+    added = buffer.extend([200, 100, 300, 300], [9, 9, 3, 8])
+    assert added[0].tolist() == [300]
+    buffer.append(200, 9)
+    assert contents(buffer) == ([100, 200, 300], [1, 2, 3])
+
+
+def test_full_buffer_keeps_newest():
+    buffer = GlucoseBuffer(capacity=3)
+    for t in range(5):
+        buffer.append(t * 100, t)
+    added = buffer.extend([50, 350], [0.5, 3.5])
+    assert added[0].tolist() == [350]
+    assert contents(buffer) == ([300, 350, 400], [3, 3.5, 4])
+    assert buffer.last == (400, 4.0)
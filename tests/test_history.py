@@ -0,0 +1,60 @@
+# tests/test_history.py
+import gc
+import os
+
+from history import ConversationHistory, prune_logs
+
+
+def make_history(tmp_path, count=5, tail_size=2):
+    history = ConversationHistory(str(tmp_path / 'session.jsonl'), tail_size=tail_size)
+    for i in range(count):
+        history.append(f"question {i} about insulin", 'Patient', 'medication', timestamp=i)
+    return history
+
+
+def test_page_reads_back_from_log(tmp_path):
+    history = make_history(tmp_path)
+    assert [r.timestamp for r in history.page(0, 5)] == [0, 1, 2, 3, 4]
+    assert [r.timestamp for r in history.records([4, 0, 2])] == [4, 0, 2]
+    assert history[1].question == "question 1 about insulin"
+    assert history.search("question 3") == [3]
+
+
+def test_prune_keeps_logs_of_open_histories(tmp_path):
+    history = make_history(tmp_path)
+    stale = tmp_path / 'ended.jsonl'
+    stale.write_text('')
+    os.utime(history.path, (0, 0))
+    os.utime(stale, (0, 0))
+    assert prune_logs(str(tmp_path)) == 1
+    assert os.path.exists(history.path) and not stale.exists()
+    del history
+    gc.collect()
+    assert prune_logs(str(tmp_path)) == 1
+
+
+def test_deleted_log_keeps_tail(tmp_path):
+    history = make_history(tmp_path)
+    os.remove(history.path)
+    assert [r.timestamp for r in history.page(0, 5)] == [3, 4]
+    assert history.lost == 3 and len(history) == 2
+    history.append("question 5", 'Patient', None, timestamp=5)
+    assert [r.timestamp for r in history.page(0, 3)] == [3, 4, 5]
+
+
+def test_append_after_log_deleted(tmp_path):
+    history = make_history(tmp_path)
+    os.remove(history.path)
+    history.append("question 5", 'Patient', None, timestamp=5)
+    history.append("question 6", 'Patient', None, timestamp=6)
+    # The restarted log holds the old tail at the front, read back by offset
+    assert [r.timestamp for r in history.page(0, 4)] == [3, 4, 5, 6]
+    assert history.lost == 3
+
+
+def test_truncated_log_drops_unreadable_positions(tmp_path):
+    history = make_history(tmp_path)
+    with open(history.path, 'r+b') as f:
+        f.truncate(10)
+    assert [r.timestamp for r in history.records([4, 0, 3])] == [4, 3]
+    assert history.search("insulin") == [1, 0]